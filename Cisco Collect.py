@@ -1,104 +1,108 @@
+import queue
+import threading
 import tkinter as tk
-from tkinter import messagebox
-from netmiko import ConnectHandler
-import datetime
-import os
-
-# Import your custom processing modules
-from process_cdp_neighbors import process_cdp_neighbors  # renamed from process_commands.py
-from process_mac_address_table import process_mac_address_table
+from tkinter import messagebox, ttk
+
+from collector import CollectionCancelled, build_device, collect_switch, connection_error_hint
+from connection_pool import ConnectionPool
+
+# Logged-in sessions kept warm between runs, so repeat collections start straight away.
+connection_pool = ConnectionPool(idle_timeout=300)
+
+# Switches waiting to be collected, taken one at a time by the background worker.
+job_queue = queue.Queue()
+# Progress and results sent back from the worker to the GUI thread.
+event_queue = queue.Queue()
+# Set by the Cancel button to stop the switch currently being collected.
+cancel_event = threading.Event()
+
+def collection_worker():
+    # Runs in a background thread so the window stays responsive during long sessions.
+    while True:
+        try:
+            device = job_queue.get(timeout=30)
+        except queue.Empty:
+            # Nothing to do, close any sessions that have been idle too long.
+            connection_pool.evict_expired()
+            continue
+        host = device['host']
+        cancel_event.clear()
+
+        def progress(done, total, command):
+            event_queue.put(('progress', host, done, total, command))
+
+        event_queue.put(('started', host))
+        try:
+            output_files = collect_switch(device, progress=progress, cancel_event=cancel_event,
+                                          pool=connection_pool)
+            event_queue.put(('done', host, output_files))
+        except CollectionCancelled:
+            event_queue.put(('cancelled', host))
+        except Exception as e:
+            event_queue.put(('error', host, e, device))
+        finally:
+            job_queue.task_done()
+
+def poll_events():
+    # Apply every event the worker has posted since the last poll, then check again shortly.
+    try:
+        while True:
+            event = event_queue.get_nowait()
+            kind, host = event[0], event[1]
+            if kind == 'started':
+                progress_bar['value'] = 0
+                status_var.set(f"Connecting to {host}...")
+            elif kind == 'progress':
+                done, total, command = event[2], event[3], event[4]
+                progress_bar['maximum'] = total
+                progress_bar['value'] = done
+                if command:
+                    status_var.set(f"{host}: {command} ({done + 1}/{total})")
+            elif kind == 'done':
+                files_message = "\n".join(event[2])
+                status_var.set(f"{host}: finished.")
+                messagebox.showinfo("Success", f"Commands executed successfully on {host}. Files created:\n{files_message}")
+            elif kind == 'cancelled':
+                status_var.set(f"{host}: cancelled.")
+            elif kind == 'error':
+                error, device = event[2], event[3]
+                suggestion = connection_error_hint(device, error)
+                status_var.set(f"{host}: failed.")
+                messagebox.showerror("Error", f"An error occurred on {host}:\n{error}{suggestion}")
+    except queue.Empty:
+        pass
+    waiting = job_queue.unfinished_tasks
+    queue_var.set(f"Switches queued/running: {waiting}" if waiting else "Idle")
+    root.after(100, poll_events)
 
 def run_commands():
     # Retrieve user input from GUI fields
-    hostname = hostname_entry.get()
+    hostnames = [name.strip() for name in hostname_entry.get().replace(";", ",").split(",") if name.strip()]
     username = username_entry.get()
     password = password_entry.get()
     use_ssh_value = use_ssh.get()  # True if SSH checkbox is checked
 
-    if not hostname or not username or not password:
+    if not hostnames or not username or not password:
         messagebox.showerror("Input Error", "Please fill in all fields.")
         return
 
-    # Build the device dictionary based on the SSH option.
-    device = {
-        'host': hostname,
-        'username': username,
-        'password': password,
-    }
-    if use_ssh_value:
-        device['device_type'] = 'cisco_ios'       # SSH connection
-    else:
-        device['device_type'] = 'cisco_ios_telnet'  # Telnet connection
-
-    # Define the list of commands (or markers) to execute.
-    # "sh running-config" is added as the final command.
-    commands = [
-        'show vlan',
-        'show auth sessions',
-        'process_cdp_neighbors',       # Special processing for CDP neighbors
-        'filter_int_status_10mb',      # Special processing for "show int status"
-        'process_mac_address_table',   # Special processing for MAC address table
-        'sh running-config'            # This command is executed last
-    ]
-
-    # Mapping for marker commands to custom filename parts.
-    special_command_names = {
-        'filter_int_status_10mb': '10mb_interfaces',
-        'process_cdp_neighbors': 'cdp_neighbors_processed',
-        'process_mac_address_table': 'mac_address_table_processed'
-    }
-
-    date_str = datetime.datetime.now().strftime('%Y%m%d')
-    output_dir = r"C:\Cisco Output"
-    os.makedirs(output_dir, exist_ok=True)
-    
-    output_files = []
-    
-    try:
-        net_connect = ConnectHandler(**device)
-        
-        for command in commands:
-            # Determine the filename portion.
-            if command in special_command_names:
-                command_filename = special_command_names[command]
-            else:
-                command_filename = command.replace(" ", "_").replace("/", "_").replace("|", "")
-            
-            filename = f"{hostname}_{date_str}_{command_filename}.txt"
-            file_path = os.path.join(output_dir, filename)
-            
-            # Process commands based on marker.
-            if command == 'process_cdp_neighbors':
-                raw_output = net_connect.send_command("show cdp neighbors")
-                output = process_cdp_neighbors(raw_output)
-            elif command == 'filter_int_status_10mb':
-                raw_output = net_connect.send_command("show int status")
-                output = "\n".join(line for line in raw_output.splitlines() if "a-10 " in line)
-            elif command == 'process_mac_address_table':
-                trunk_raw_output = net_connect.send_command("show int trunk")
-                mac_raw_output = net_connect.send_command("show mac address-table")
-                output = process_mac_address_table(mac_raw_output, trunk_raw_output)
-            else:
-                output = net_connect.send_command(command)
-            
-            # Write the output to file.
-            with open(file_path, "w") as file:
-                file.write(output)
-            output_files.append(file_path)
-        
-        net_connect.disconnect()
-        files_message = "\n".join(output_files)
-        messagebox.showinfo("Success", f"Commands executed successfully. Files created:\n{files_message}")
-    
-    except Exception as e:
-        error_msg = str(e).lower()
-        suggestion = ""
-        # If the error message indicates connection refusal and SSH isn't enabled, suggest using SSH.
-        if not use_ssh_value and "actively refused" in error_msg:
-            suggestion = "\nIt appears that the switch may require SSH connectivity. Please try checking the 'Use SSH' option."
-        messagebox.showerror("Error", f"An error occurred:\n{e}{suggestion}")
+    # Build the device dictionary based on the SSH option and queue it for the worker.
+    for hostname in hostnames:
+        job_queue.put(build_device(hostname, username, password, use_ssh_value))
+
+def cancel_commands():
+    # Drop the switches still waiting, then stop the one currently running.
+    while True:
+        try:
+            job_queue.get_nowait()
+        except queue.Empty:
+            break
+        job_queue.task_done()
+    cancel_event.set()
 
 def exit_app():
+    cancel_commands()
+    connection_pool.close_all()
     root.destroy()
 
 # Create the main window for the GUI
@@ -122,10 +126,27 @@ use_ssh = tk.BooleanVar()
 ssh_checkbox = tk.Checkbutton(root, text="Use SSH", variable=use_ssh)
 ssh_checkbox.grid(row=3, column=0, columnspan=2, pady=10)
 
+# Several switches can be queued at once by separating them with commas.
 run_button = tk.Button(root, text="Run Commands", command=run_commands)
 run_button.grid(row=4, column=0, columnspan=2, pady=10)
 
+cancel_button = tk.Button(root, text="Cancel", command=cancel_commands)
+cancel_button.grid(row=5, column=0, columnspan=2, pady=10)
+
+# Per-command progress for the switch currently being collected.
+progress_bar = ttk.Progressbar(root, length=300, mode="determinate")
+progress_bar.grid(row=6, column=0, columnspan=2, padx=10, pady=5)
+
+status_var = tk.StringVar(value="Ready")
+tk.Label(root, textvariable=status_var).grid(row=7, column=0, columnspan=2, padx=10)
+
+queue_var = tk.StringVar(value="Idle")
+tk.Label(root, textvariable=queue_var).grid(row=8, column=0, columnspan=2, padx=10, pady=5)
+
 exit_button = tk.Button(root, text="Exit", command=exit_app)
-exit_button.grid(row=5, column=0, columnspan=2, pady=10)
+exit_button.grid(row=9, column=0, columnspan=2, pady=10)
+
+threading.Thread(target=collection_worker, daemon=True).start()
+root.after(100, poll_events)
 
-root.mainloop()
\ No newline at end of file
+root.mainloop()
@@ -0,0 +1,430 @@
+"""
+Optional asyncio collection backend.
+
+Instead of a thread per switch with netmiko's blocking send_command, this backend
+drives every Telnet/SSH session from a single event loop. Switches are put on an
+asyncio queue as jobs of (device, commands), and a bounded number of worker
+coroutines take a job each and run that switch's command pipeline over one session.
+Hundreds of switches can be in flight at once without a thread per device.
+
+The output files are identical to the threaded engine in collector.py, as the
+same filenames and processors (processors.py) are used.
+
+Telnet is handled with asyncio streams directly. SSH needs the optional
+"asyncssh" package. A device dictionary may include a 'port', which is also how
+the backend is pointed at the local fake switch in fake_cisco_server.py.
+"""
+import asyncio
+import codecs
+import datetime
+import os
+import re
+import tempfile
+import time
+
+from collector import (COMMANDS, DEFAULT_DEVICE_TIMEOUT, DEFAULT_OUTPUT_DIR, CommandCache, StreamingOutput,
+                       output_path, prompt_pattern, raw_commands_for, raw_output_paths, write_lines)
+from config_fingerprints import CHANGE_MARKER_COMMAND, is_running_config, parse_change_marker
+from output_files import atomic_output
+from processors import PROCESSORS, run_processor
+from text_parsing import read_lines
+
+try:
+    import asyncssh
+except ImportError:  # SSH support is optional, Telnet works without it.
+    asyncssh = None
+
+# Default number of switch sessions open at the same time.
+DEFAULT_MAX_SESSIONS = 500
+
+# Telnet protocol bytes (RFC 854).
+IAC = 255
+DONT = 254
+DO = 253
+WONT = 252
+WILL = 251
+SB = 250
+SE = 240
+
+# The switch prompt, e.g. "SW-CLOSET-01#" or "SW-CLOSET-01>" on its own at the end of the output.
+PROMPT_PATTERN = re.compile(rb"(?:^|[\r\n])([\w.\-@()/:]+[>#]) ?$")
+USERNAME_PATTERN = re.compile(rb"(?:[Uu]sername|[Ll]ogin): ?$")
+PASSWORD_PATTERN = re.compile(rb"[Pp]assword: ?$")
+LOGIN_FAILED_PATTERN = re.compile(rb"% (?:Login invalid|Authentication failed|Bad passwords)")
+
+# Only the tail of the received text is searched for a prompt, so large outputs
+# are not rescanned from the start after every read.
+PROMPT_SEARCH_WINDOW = 256
+
+
+class TelnetFilter:
+    """
+    Strip Telnet option negotiation out of the incoming byte stream.
+
+    Every option the switch offers or asks for is refused (the same as Python's old
+    telnetlib default), and the replies are collected in `replies` to be sent back.
+    Negotiation sequences split across reads are carried over to the next chunk.
+    """
+
+    def __init__(self):
+        self.pending = b""
+        self.replies = bytearray()
+
+    def feed(self, data):
+        data = self.pending + data
+        self.pending = b""
+        text = bytearray()
+        i = 0
+        while i < len(data):
+            # Copy plain text up to the next IAC in one slice.
+            next_iac = data.find(IAC, i)
+            if next_iac == -1:
+                text += data[i:]
+                break
+            text += data[i:next_iac]
+            i = next_iac
+            if i + 1 >= len(data):
+                self.pending = data[i:]
+                break
+            command = data[i + 1]
+            if command == IAC:  # Escaped 0xFF data byte.
+                text.append(IAC)
+                i += 2
+            elif command in (DO, DONT, WILL, WONT):
+                if i + 2 >= len(data):
+                    self.pending = data[i:]
+                    break
+                option = data[i + 2]
+                if command == DO:
+                    self.replies += bytes((IAC, WONT, option))
+                elif command == WILL:
+                    self.replies += bytes((IAC, DONT, option))
+                i += 3
+            elif command == SB:
+                end = data.find(bytes((IAC, SE)), i + 2)
+                if end == -1:
+                    self.pending = data[i:]
+                    break
+                i = end + 2
+            else:
+                i += 2
+        return bytes(text)
+
+
+class CliSession:
+    """
+    Base class for an interactive CLI session on a switch.
+
+    Subclasses provide connect(), _read() and _write(); this class handles login
+    prompts, waiting for the switch prompt and cleaning up command output.
+    """
+
+    login_return = b"\r\n"
+    command_return = b"\n"
+
+    def __init__(self, device):
+        self.device = device
+        self.buffer = bytearray()
+        self.prompt_pattern = PROMPT_PATTERN
+        self.prompt = None
+
+    async def connect(self):
+        raise NotImplementedError
+
+    async def _read(self):
+        raise NotImplementedError
+
+    def _write(self, data):
+        raise NotImplementedError
+
+    async def close(self):
+        raise NotImplementedError
+
+    async def read_until(self, *patterns):
+        """
+        Read from the switch until the end of the received text matches one of the patterns.
+
+        Returns:
+            tuple: (index of the pattern that matched, text read including the match)
+        """
+        while True:
+            start = max(0, len(self.buffer) - PROMPT_SEARCH_WINDOW)
+            for index, pattern in enumerate(patterns):
+                if pattern.search(self.buffer, start):
+                    data, self.buffer = bytes(self.buffer), bytearray()
+                    return index, data
+            chunk = await self._read()
+            if not chunk:
+                raise ConnectionError(f"Connection to {self.device['host']} closed unexpectedly.")
+            self.buffer += chunk
+
+    async def login(self):
+        """
+        Answer the Username/Password prompts (if any) and wait for the switch prompt.
+        """
+        sent_password = False
+        while True:
+            index, data = await self.read_until(PROMPT_PATTERN, USERNAME_PATTERN, PASSWORD_PATTERN)
+            if LOGIN_FAILED_PATTERN.search(data) or (index == 1 and sent_password):
+                raise PermissionError(f"Login to {self.device['host']} failed.")
+            if index == 0:
+                # From now on only the exact prompt of this switch ends a command's output.
+                prompt = PROMPT_PATTERN.search(data).group(1)
+                self.prompt = prompt.decode(errors="replace")
+                self.prompt_pattern = re.compile(rb"[\r\n]" + re.escape(prompt) + rb" ?$")
+                break
+            if index == 1:
+                self._write(self.device['username'].encode() + self.login_return)
+            else:
+                self._write(self.device['password'].encode() + self.login_return)
+                sent_password = True
+        await self.send_command("terminal length 0")
+
+    async def send_command(self, command):
+        """
+        Send a command and return its output, without the echoed command or trailing prompt.
+        """
+        self._write(command.encode() + self.command_return)
+        _, data = await self.read_until(self.prompt_pattern)
+        lines = data.decode(errors="replace").replace("\r\n", "\n").replace("\r", "").split("\n")
+        # Drop the echoed command and the trailing prompt.
+        if lines and lines[0].strip() == command:
+            lines = lines[1:]
+        if lines:
+            lines = lines[:-1]
+        return "\n".join(lines)
+
+    async def send_command_to_file(self, command, file):
+        """
+        Send a command and stream its output into a text file as it arrives,
+        without the echoed command or trailing prompt.
+        """
+        self._write(command.encode() + self.command_return)
+        output = StreamingOutput(file, command, self.prompt, prompt_pattern(self.prompt))
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        data, self.buffer = bytes(self.buffer), bytearray()
+        while True:
+            if data and output.feed(decoder.decode(data)):
+                return
+            data = await self._read()
+            if not data:
+                raise ConnectionError(f"Connection to {self.device['host']} closed unexpectedly.")
+
+
+class TelnetSession(CliSession):
+    """
+    Telnet session using asyncio streams.
+    """
+
+    async def connect(self):
+        self.reader, self.writer = await asyncio.open_connection(self.device['host'],
+                                                                 self.device.get('port', 23))
+        self.telnet = TelnetFilter()
+
+    async def _read(self):
+        while True:
+            data = await self.reader.read(65536)
+            if not data:
+                return b""
+            text = self.telnet.feed(data)
+            if self.telnet.replies:
+                self.writer.write(bytes(self.telnet.replies))
+                self.telnet.replies.clear()
+            if text:
+                return text
+
+    def _write(self, data):
+        self.writer.write(data.replace(bytes((IAC,)), bytes((IAC, IAC))))
+
+    async def close(self):
+        self.writer.close()
+        try:
+            await self.writer.wait_closed()
+        except ConnectionError:
+            pass
+
+
+class SSHSession(CliSession):
+    """
+    SSH session using the optional asyncssh package.
+    """
+
+    login_return = b"\n"
+
+    async def connect(self):
+        if asyncssh is None:
+            raise RuntimeError("SSH in the asyncio backend needs the 'asyncssh' package installed.")
+        self.connection = await asyncssh.connect(
+            self.device['host'],
+            port=self.device.get('port', 22),
+            username=self.device['username'],
+            password=self.device['password'],
+            known_hosts=None,
+        )
+        self.process = await self.connection.create_process(term_type='vt100', encoding=None)
+
+    async def _read(self):
+        return await self.process.stdout.read(65536)
+
+    def _write(self, data):
+        self.process.stdin.write(data)
+
+    async def close(self):
+        self.connection.close()
+        await self.connection.wait_closed()
+
+
+async def open_session(device):
+    """
+    Open and log into a CLI session for a netmiko style device dictionary.
+    """
+    if device.get('device_type') == 'cisco_ios':
+        session = SSHSession(device)
+    else:
+        session = TelnetSession(device)
+    await session.connect()
+    try:
+        await session.login()
+    except BaseException:
+        await session.close()
+        raise
+    return session
+
+
+async def collect_switch_async(device, output_dir=DEFAULT_OUTPUT_DIR, date_str=None, commands=None,
+                               fingerprints=None, compression=None, records=None):
+    """
+    Run one switch's command pipeline over a single session and write the output files.
+
+    Every raw CLI command needed by the commands/markers is sent once, in order, with
+    its output streamed to disk as it arrives. The processors then run and their
+    output is written exactly as collector.collect_switch does, including skipping an
+    unchanged running-config when a FingerprintStore is given and compressing the output
+    files when a compression ("zstd", "gzip") is given. With a RecordIndex the parsed
+    records are loaded into it as well.
+
+    Returns:
+        list: Paths of the files created, in command order.
+    """
+    if date_str is None:
+        date_str = datetime.datetime.now().strftime('%Y%m%d')
+    commands = device.get('commands') or commands or COMMANDS
+
+    os.makedirs(output_dir, exist_ok=True)
+    output_files = []
+    with tempfile.TemporaryDirectory(prefix=".spool_", dir=output_dir) as spool_dir:
+        paths = raw_output_paths(commands, output_dir, spool_dir, device['host'], date_str, compression)
+        cache = CommandCache()
+        session = await open_session(device)
+        try:
+            for raw_command in raw_commands_for(commands):
+                incremental = fingerprints is not None and is_running_config(raw_command)
+                if incremental:
+                    marker_path = os.path.join(spool_dir, "config_change_marker.txt")
+                    with atomic_output(marker_path) as file:
+                        await session.send_command_to_file(CHANGE_MARKER_COMMAND, file)
+                    marker = parse_change_marker(read_lines(marker_path))
+                    # Hashing and copying the previous config block, so they run in a thread.
+                    if await asyncio.to_thread(fingerprints.reuse, device['host'], marker, paths[raw_command]):
+                        cache.store(raw_command, paths[raw_command])
+                        continue
+                with atomic_output(paths[raw_command]) as file:
+                    await session.send_command_to_file(raw_command, file)
+                if incremental:
+                    await asyncio.to_thread(fingerprints.record, device['host'], marker, paths[raw_command])
+                cache.store(raw_command, paths[raw_command])
+        finally:
+            await session.close()
+
+        def process_and_write(command):
+            file_path = output_path(output_dir, device['host'], date_str, command, compression)
+            return write_lines(file_path, run_processor(command, cache.lines))
+
+        # Processing, writing and loading records block, so they run in threads, off the
+        # event loop, and the other sessions keep being served meanwhile.
+        for command in dict.fromkeys(commands):
+            if command in PROCESSORS:
+                output_files.append(await asyncio.to_thread(process_and_write, command))
+            else:
+                output_files.append(cache.fetch(command))
+        if records is not None:
+            await asyncio.to_thread(records.load_outputs, device['host'], date_str, dict(cache.paths))
+    return output_files
+
+
+async def collect_switches_async(devices, output_dir=DEFAULT_OUTPUT_DIR, date_str=None, commands=None,
+                                 max_sessions=DEFAULT_MAX_SESSIONS, timeout=DEFAULT_DEVICE_TIMEOUT,
+                                 on_result=None, fingerprints=None, compression=None, records=None):
+    """
+    Collect a list of switches from one event loop.
+
+    Parameters:
+        devices (list): netmiko style device dictionaries.
+        max_sessions (int): Maximum number of switch sessions open at the same time.
+        timeout (float): Seconds allowed for each switch.
+        on_result (callable): Optional, called with each result as soon as that switch
+            finishes. It runs in a worker thread, off the event loop, one call at a time.
+        fingerprints (FingerprintStore): Optional, skip pulling unchanged running-configs.
+        compression (str): Optional, "zstd" or "gzip" to compress the output files.
+        records (RecordIndex): Optional, load the parsed records into this database too.
+
+    Returns:
+        list: One result per switch, in the same order and layout as collector.collect_switches.
+    """
+    if date_str is None:
+        date_str = datetime.datetime.now().strftime('%Y%m%d')
+    devices = list(devices)
+    results = [None] * len(devices)
+
+    # on_result may do slow work (e.g. moving files into a content store); one call at a time.
+    result_lock = asyncio.Lock()
+    jobs = asyncio.Queue()
+    for index, device in enumerate(devices):
+        jobs.put_nowait((index, device))
+
+    async def worker():
+        while True:
+            try:
+                index, device = jobs.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            start = time.monotonic()
+            try:
+                files = await asyncio.wait_for(
+                    collect_switch_async(device, output_dir, date_str, commands, fingerprints, compression,
+                                         records),
+                    timeout)
+                error = None
+            except asyncio.TimeoutError:
+                files = []
+                error = TimeoutError("Device timeout reached before all commands completed.")
+            except Exception as e:
+                files = []
+                error = e
+            result = {
+                'host': device['host'],
+                'index': index,
+                'files': files,
+                'error': error,
+                'elapsed': time.monotonic() - start,
+            }
+            results[index] = result
+            if on_result is not None:
+                async with result_lock:
+                    await asyncio.to_thread(on_result, result)
+            jobs.task_done()
+
+    workers = [asyncio.create_task(worker()) for _ in range(min(max_sessions, len(devices)))]
+    await asyncio.gather(*workers)
+    return results
+
+
+def run_collect_switches_async(devices, output_dir=DEFAULT_OUTPUT_DIR, date_str=None, commands=None,
+                               max_sessions=DEFAULT_MAX_SESSIONS, timeout=DEFAULT_DEVICE_TIMEOUT,
+                               on_result=None, fingerprints=None, compression=None, records=None):
+    """
+    Blocking wrapper around collect_switches_async for callers without an event loop.
+    """
+    return asyncio.run(collect_switches_async(devices, output_dir, date_str, commands,
+                                              max_sessions, timeout, on_result, fingerprints, compression,
+                                              records))
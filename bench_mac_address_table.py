@@ -0,0 +1,90 @@
+"""
+Benchmark the MAC address table report on synthetic tables.
+
+Compares the line-by-line processor (process_mac_address_table) with the bulk,
+columnar one (mac_table.process_mac_address_table_bulk) and checks that both
+produce the same report. The memory held by the parsed table is also compared:
+a list of MacEntry records against a columnar MacTable.
+
+    python bench_mac_address_table.py --entries 100000 --repeat 5
+"""
+import argparse
+import random
+import timeit
+import tracemalloc
+
+from mac_table import MacTable, process_mac_address_table_bulk
+from process_mac_address_table import format_mac, parse_mac_address_table, process_mac_address_table
+
+TRUNK_OUTPUT = """
+Port        Mode             Encapsulation  Status        Native vlan
+Te1/1/1     on               802.1q         trunking      1
+Te2/1/1     on               802.1q         trunking      1
+Po1         on               802.1q         trunking      1
+"""
+
+
+def synthetic_mac_table(entries, seed=1):
+    """
+    Build a 'show mac address-table' output with the given number of entries,
+    spread over access ports of an 8-member stack and a few trunks.
+    """
+    rng = random.Random(seed)
+    access_ports = [f"Gi{member}/0/{port}" for member in range(1, 9) for port in range(1, 49)]
+    trunk_ports = ["Te1/1/1", "Te2/1/1", "Po1", "Port-channel1"]
+    lines = [
+        "          Mac Address Table",
+        "-------------------------------------------",
+        "",
+        "Vlan    Mac Address       Type        Ports",
+        "----    -----------       --------    -----",
+        " All    0100.0ccc.cccc    STATIC      CPU",
+    ]
+    for _ in range(entries):
+        port = rng.choice(trunk_ports) if rng.random() < 0.7 else rng.choice(access_ports)
+        lines.append(f"{rng.randint(1, 4094):>4}    {format_mac(rng.getrandbits(48))}    DYNAMIC     {port}")
+    lines.append(f"Total Mac Addresses for this criterion: {entries + 1}")
+    return "\n".join(lines)
+
+
+def parsed_size(build):
+    """
+    Return the bytes still allocated after build(), i.e. the size of what it returns.
+    """
+    tracemalloc.start()
+    result = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return size
+
+
+def best_time(function, repeat):
+    return min(timeit.Timer(function).repeat(repeat=repeat, number=1))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the MAC address table processors.")
+    parser.add_argument("--entries", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    raw_mac_output = synthetic_mac_table(args.entries)
+    if process_mac_address_table(raw_mac_output, TRUNK_OUTPUT) != process_mac_address_table_bulk(raw_mac_output, TRUNK_OUTPUT):
+        raise SystemExit("The line-by-line and bulk reports differ.")
+
+    print(f"Full report, {args.entries} entries:")
+    line_time = best_time(lambda: process_mac_address_table(raw_mac_output, TRUNK_OUTPUT), args.repeat)
+    bulk_time = best_time(lambda: process_mac_address_table_bulk(raw_mac_output, TRUNK_OUTPUT), args.repeat)
+    print(f"  line-by-line: {line_time * 1000:8.1f} ms")
+    print(f"          bulk: {bulk_time * 1000:8.1f} ms")
+    print(f"       speedup: {line_time / bulk_time:8.2f}x")
+
+    print(f"Parsed table size, {args.entries} entries:")
+    record_size = parsed_size(lambda: list(parse_mac_address_table(raw_mac_output.splitlines())))
+    column_size = parsed_size(lambda: MacTable.from_text(raw_mac_output))
+    print(f"  MacEntry list: {record_size / 1024 / 1024:8.1f} MiB")
+    print(f"       MacTable: {column_size / 1024 / 1024:8.1f} MiB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Benchmark the shared text-parsing helpers (text_parsing.py) on synthetic output.
+
+Times the helpers every processor goes through: splitting raw output into lines,
+merging wrapped lines, grouping wrapped entries, skipping to the heading line and
+slicing fixed-width columns, plus the full CDP report built on top of them.
+
+    python bench_text_parsing.py --lines 100000 --repeat 5
+"""
+import argparse
+import collections
+import timeit
+
+from process_cdp_neighbors import CDP_COLUMNS, process_cdp_neighbors
+from text_parsing import (column_offsets, iter_after_header, iter_lines, iter_merge_wrapped_lines,
+                          iter_wrapped_entries, slice_columns, starts_with)
+
+HEADER = "Device ID        Local Intrfce     Holdtme    Capability  Platform  Port ID"
+ROWS = [
+    "sav01-lab        Gig 1/0/2         170              S I   WS-C2960- Gig 0/1",
+    "ap-lobby-01      Gig 1/0/3         120              R T   C9120AXI- Gig 0",
+    "SEP001122334455  Gig 1/0/4         131              H P M IP Phone  Port 1",
+    "LBDS-CORE01.example.com",
+    "                 Ten 1/1/1         150             R S I  C9500-48Y Ten 1/0/1",
+]
+
+
+def synthetic_cdp_output(lines):
+    """
+    Build a 'show cdp neighbors' output of about the given number of lines.
+    """
+    body = [ROWS[index % len(ROWS)] for index in range(lines)]
+    return "\n".join([HEADER] + body + [f"Total cdp entries displayed : {lines}"])
+
+
+def best_time(function, repeat):
+    return min(timeit.Timer(function).repeat(repeat=repeat, number=1))
+
+
+def consume(iterator):
+    collections.deque(iterator, maxlen=0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the shared text-parsing helpers.")
+    parser.add_argument("--lines", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    raw_output = synthetic_cdp_output(args.lines)
+    lines = raw_output.splitlines()
+    offsets = column_offsets(HEADER, CDP_COLUMNS)
+
+    benchmarks = [
+        ("iter_lines", lambda: consume(iter_lines(raw_output))),
+        ("iter_after_header", lambda: consume(iter_after_header(lines, starts_with("Device ID")))),
+        ("iter_merge_wrapped_lines", lambda: consume(iter_merge_wrapped_lines(lines))),
+        ("iter_wrapped_entries", lambda: consume(iter_wrapped_entries(lines))),
+        ("slice_columns", lambda: consume(slice_columns(line, offsets) for line in lines)),
+        ("process_cdp_neighbors", lambda: process_cdp_neighbors(raw_output)),
+    ]
+    print(f"{args.lines} lines, best of {args.repeat}:")
+    for name, function in benchmarks:
+        elapsed = best_time(function, args.repeat)
+        print(f"  {name:>24}: {elapsed * 1000:8.1f} ms  ({elapsed / args.lines * 1e6:6.2f} us/line)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+"""
+Classification rules for the processed reports, loaded from a rules file.
+
+The CDP category keywords and the interface prefix mapping used by the MAC address
+table report live in a JSON rules file (classification_rules.json next to this module,
+or the file named by the CISCO_COLLECT_RULES environment variable). A new AP model
+or uplink naming scheme is then a one-line edit to the rules file rather than a code
+change.
+
+    {
+        "format": 1,
+        "version": "2026-10-15",
+        "cdp_categories": [
+            {"category": "sav", "device_id": ["sav01"], "platform": ["CBS350"]},
+            {"category": "wap", "platform": ["C9120AXI", "AIR-AP"]},
+            ...
+        ],
+        "interface_prefixes": {"Po": "Port-channel", "Gi": "GigabitEthernet"}
+    }
+
+Each CDP category lists keywords per neighbor field (device_id, local_interface,
+platform, port_id), so e.g. an AP model only matches the platform column and not a
+hostname that happens to contain it. "keywords" matches anywhere in the line, as
+older rules files did. Categories are tried in the order listed.
+
+The file is compiled into a RuleSet (one KeywordClassifier per CDP field)
+once per change. current_rules() checks the file's modification time at most once per
+RULES_CHECK_INTERVAL seconds, so a long-running collector picks up an edited file on
+its next report without restarting, while a report still only pays for a stat() call.
+If the file is missing the built-in DEFAULT_RULES are used. If it does not parse,
+the rules that were last loaded successfully are kept.
+"""
+import json
+import os
+import re
+import threading
+import time
+
+from interface_names import InterfaceNameNormalizer
+
+# Rules file format understood by this module.
+RULES_FORMAT = 1
+
+# Rules file used when CISCO_COLLECT_RULES is not set.
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "classification_rules.json")
+
+# Seconds between checks of the rules file for changes.
+RULES_CHECK_INTERVAL = 2.0
+
+# CDP categories the report has a section for.
+CDP_CATEGORIES = ("sav", "uplink", "wap", "phone")
+
+# CdpNeighbor fields a CDP category rule can match on.
+CDP_FIELDS = ("device_id", "local_interface", "platform", "port_id")
+
+# Built-in rules, used when there is no rules file.
+DEFAULT_RULES = {
+    "format": RULES_FORMAT,
+    "version": "built-in",
+    # Priority order: a neighbor goes in the first category with a keyword in the given field.
+    # Devices recognised by platform come before the hostname-based uplink rule, so an AP or
+    # phone whose name contains "BDS" is not taken for a distribution switch.
+    "cdp_categories": [
+        {"category": "sav", "device_id": ["sav01", "sav02", "sav03", "SAV01", "SAV02", "SAV03"],
+         "platform": ["CBS350"]},
+        {"category": "wap", "platform": ["C9120AXI", "C9130A", "C9120A", "CW9166I", "AIR-AP"]},
+        # The summary output cuts the platform column short, so "T33" anywhere in the line
+        # (e.g. the device ID of a Yealink handset) still counts, as in the original report.
+        {"category": "phone", "platform": ["T33"], "keywords": ["T33"]},
+        {"category": "uplink", "device_id": ["LBDS", "BDS", "SBDS", "HDS", "CPDS"]},
+    ],
+    # Interface type abbreviation -> full type name, on top of those in interface_names.
+    "interface_prefixes": {
+        "Po": "Port-channel",
+        "Gi": "GigabitEthernet",
+        "Te": "TenGigabitEthernet",
+        "Fa": "FastEthernet",
+    },
+}
+
+
+class KeywordClassifier:
+    """
+    Classify lines by keyword, with every category's keywords compiled into one regex.
+
+    The pattern is an alternation of all keywords, one named group per category,
+    listed in priority order, so at each position the highest-priority category is
+    tried first. The line is scanned once from left to right, with each search resuming
+    just after the start of the previous match, so overlapping keywords are not missed.
+    It gives the same answer as testing each category's keywords in turn, while the
+    cost stays flat as the keyword lists grow from a handful to hundreds of entries.
+
+    Parameters:
+        rules (list): (category, keywords) pairs in priority order.
+        default: Value returned when no keyword matches.
+    """
+
+    def __init__(self, rules, default=None):
+        self.categories = [category for category, _ in rules]
+        self.default = default
+        alternatives = []
+        for index, (_, keywords) in enumerate(rules):
+            # Longest first, so e.g. "C9120AXI" is preferred over "C9120A" in the same category.
+            escaped = [re.escape(keyword) for keyword in sorted(set(keywords), key=len, reverse=True)]
+            if escaped:
+                alternatives.append(f"(?P<c{index}>{'|'.join(escaped)})")
+        self.pattern = re.compile("|".join(alternatives)) if alternatives else None
+
+    def classify(self, line):
+        """
+        Return the highest-priority category with a keyword in the line, or the default.
+        """
+        best = self.priority(line)
+        return self.default if best is None else self.categories[best]
+
+    def priority(self, line):
+        """
+        Return the index of the highest-priority category with a keyword in the line, or None.
+        """
+        if self.pattern is None or not line:
+            return None
+        best = None
+        search = self.pattern.search
+        match = search(line)
+        while match is not None:
+            index = int(match.lastgroup[1:])
+            if best is None or index < best:
+                best = index
+                if best == 0:
+                    break
+            match = search(line, match.start() + 1)
+        return best
+
+
+class RuleSet:
+    """
+    Compiled classification rules.
+
+    Attributes:
+        version (str): Version string from the rules file, for logging which rules a report used.
+        cdp_classifier (KeywordClassifier): Classifies whole CDP lines ("keywords" rules).
+        cdp_field_classifiers (dict): CdpNeighbor field -> KeywordClassifier for that field's rules.
+        interface_prefixes (list): (abbreviation, full type name) pairs added to the built-in ones.
+        interface_names (InterfaceNameNormalizer): Expands interface names using those abbreviations.
+    """
+
+    def __init__(self, data):
+        if data.get("format") != RULES_FORMAT:
+            raise ValueError(f"Unsupported rules file format: {data.get('format')!r} (expected {RULES_FORMAT}).")
+        self.version = str(data.get("version", ""))
+        rules = data.get("cdp_categories", [])
+        for rule in rules:
+            if rule["category"] not in CDP_CATEGORIES:
+                raise ValueError(f"Unknown CDP category {rule['category']!r}; "
+                                 f"expected one of {', '.join(CDP_CATEGORIES)}.")
+
+        def compile_rules(key):
+            # Every classifier lists all categories, so priorities are comparable across fields.
+            return KeywordClassifier([(rule["category"], [str(keyword) for keyword in rule.get(key, [])])
+                                      for rule in rules], default="unsorted")
+
+        self.cdp_classifier = compile_rules("keywords")
+        self.cdp_field_classifiers = {}
+        for field in CDP_FIELDS:
+            classifier = compile_rules(field)
+            if classifier.pattern is not None:
+                self.cdp_field_classifiers[field] = classifier
+        self.interface_prefixes = [(str(prefix), str(full_name))
+                                   for prefix, full_name in data.get("interface_prefixes", {}).items()]
+        self.interface_names = InterfaceNameNormalizer(aliases=self.interface_prefixes)
+
+    def classify_cdp(self, neighbor):
+        """
+        Return the category of a CdpNeighbor, or "unsorted".
+        """
+        best = None
+        if self.cdp_classifier.pattern is not None:
+            best = self.cdp_classifier.priority(neighbor.render())
+        for field, classifier in self.cdp_field_classifiers.items():
+            index = classifier.priority(getattr(neighbor, field))
+            if index is not None and (best is None or index < best):
+                best = index
+        return "unsorted" if best is None else self.cdp_classifier.categories[best]
+
+    def normalize_interface(self, interface):
+        """
+        Return the canonical (full) name of an interface, e.g. "Gi1/0/1" -> "GigabitEthernet1/0/1".
+        """
+        return self.interface_names.normalize(interface)
+
+
+class RulesFile:
+    """
+    A rules file compiled into a RuleSet and recompiled when the file changes.
+
+    Parameters:
+        path (str): Path of the JSON rules file.
+        check_interval (float): Minimum seconds between checks of the file's modification time.
+
+    Attributes:
+        error (Exception): The error from the last failed load, or None.
+    """
+
+    def __init__(self, path, check_interval=RULES_CHECK_INTERVAL):
+        self.path = path
+        self.check_interval = check_interval
+        self.error = None
+        self._rules = None
+        self._signature = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+
+    def current(self):
+        """
+        Return the compiled rules, reloading the file first if it has changed.
+        """
+        now = time.monotonic()
+        if self._rules is not None and now < self._next_check:
+            return self._rules
+        with self._lock:
+            if self._rules is None or now >= self._next_check:
+                self._next_check = now + self.check_interval
+                self._refresh()
+            return self._rules
+
+    def _refresh(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            # No rules file: fall back to the built-in rules.
+            if self._rules is None or self._signature is not None:
+                self._rules = RuleSet(DEFAULT_RULES)
+                self._signature = None
+            return
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if signature == self._signature and self._rules is not None:
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as file:
+                rules = RuleSet(json.load(file))
+        except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+            # Keep the rules that were last loaded; the file is probably mid-edit.
+            self.error = e
+            if self._rules is None:
+                self._rules = RuleSet(DEFAULT_RULES)
+            return
+        self._rules = rules
+        self._signature = signature
+        self.error = None
+
+
+_rules_file = RulesFile(os.environ.get("CISCO_COLLECT_RULES", DEFAULT_RULES_PATH))
+
+
+def current_rules():
+    """
+    Return the compiled rules from the active rules file.
+    """
+    return _rules_file.current()
+
+
+def use_rules_file(path, check_interval=RULES_CHECK_INTERVAL):
+    """
+    Switch to another rules file (e.g. from a command-line option) and return its rules.
+    """
+    global _rules_file
+    _rules_file = RulesFile(path, check_interval)
+    return _rules_file.current()
@@ -0,0 +1,238 @@
+"""
+Headless command line entry point for collecting many switches from an inventory file.
+
+Meant for unattended runs (e.g. a nightly cron job) across the whole estate:
+
+    python collect_cli.py inventory.csv --output-dir /srv/cisco-output --workers 16
+
+The inventory is a CSV file with a header row, or a YAML file with a list of
+devices (optionally under a "devices" key). Each device has:
+
+    host         Switch hostname or IP address (required).
+    transport    "ssh" or "telnet" (default "telnet").
+    credentials  Name of the credential set to use (default "default").
+    profile      Command profile from collector.COMMAND_PROFILES (default "full"; "core"
+                 builds the MAC table report in bulk, for very large tables).
+    port         TCP port, if not the standard one for the transport.
+
+Passwords are never kept in the inventory. The credential set "core" is read
+from the environment variables SWITCH_CRED_CORE_USERNAME and SWITCH_CRED_CORE_PASSWORD.
+
+Each switch's output files are written as soon as that switch finishes, and a
+line is added to a summary CSV in the output folder at the same time. The exit
+status is 1 if any switch failed.
+
+With --incremental, each switch is first asked for its last configuration change
+stamp and the running-config is only pulled again if it has changed; otherwise
+the previous run's config file is copied (see config_fingerprints.py).
+
+With --store, each switch's files are moved into a content-addressed store in the
+output folder as soon as that switch finishes, keeping each distinct file once
+(see output_store.py).
+
+With --compress, output files are compressed as they are written, e.g.
+"SW01_20261015_sh_running-config.txt.zst" (zstd if the zstandard package is
+installed, else gzip; see output_files.py).
+
+With --records, the parsed MAC tables, CDP neighbors, trunks, VLANs and interface
+status are also loaded into records.sqlite in the output folder, for queries
+across the estate (see record_index.py).
+"""
+import argparse
+import csv
+import datetime
+import os
+import re
+import sys
+
+from classification_rules import use_rules_file
+from collector import (COMMAND_PROFILES, DEFAULT_DEVICE_TIMEOUT, DEFAULT_MAX_WORKERS, DEFAULT_OUTPUT_DIR,
+                       build_device, iter_collect_switches)
+from config_fingerprints import FingerprintStore
+from output_files import COMPRESSION_SUFFIXES, available_compression
+from output_store import ContentStore
+from record_index import RECORD_COMMANDS, RecordIndex
+
+try:
+    import yaml
+except ImportError:  # YAML inventories are optional, CSV works without PyYAML.
+    yaml = None
+
+# Folder of the content store (--store) inside the output folder.
+STORE_DIRNAME = "store"
+
+# Database of parsed records (--records) inside the output folder.
+RECORDS_FILENAME = "records.sqlite"
+
+
+def load_inventory(path):
+    """
+    Read a CSV or YAML inventory file.
+
+    Returns:
+        list: One dictionary per device, with at least a 'host' entry. A host listed
+            again is skipped, with a warning.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension in (".yaml", ".yml"):
+        if yaml is None:
+            raise RuntimeError("Reading a YAML inventory needs the 'PyYAML' package installed.")
+        with open(path) as file:
+            data = yaml.safe_load(file) or []
+        if isinstance(data, dict):
+            data = data.get('devices', [])
+        entries = [dict(entry) for entry in data]
+    else:
+        # utf-8-sig: Excel saves CSV files with a byte order mark before the first heading.
+        with open(path, newline="", encoding="utf-8-sig") as file:
+            entries = [
+                {key.strip().lower(): (value or "").strip() for key, value in row.items() if key}
+                for row in csv.DictReader(file)
+            ]
+
+    inventory = []
+    hosts = set()
+    for line_number, entry in enumerate(entries, start=1):
+        if not entry.get('host'):
+            raise ValueError(f"Inventory entry {line_number} in {path} has no host.")
+        # Output files are named after the host, so a second entry would collect into the same files.
+        if entry['host'] in hosts:
+            print(f"Inventory entry {line_number} in {path} repeats {entry['host']}; skipped.", file=sys.stderr)
+            continue
+        hosts.add(entry['host'])
+        inventory.append(entry)
+    return inventory
+
+
+def resolve_credentials(reference, environ=os.environ):
+    """
+    Look up the username and password for a credential set name in the environment.
+
+    Returns:
+        tuple: (username, password)
+    """
+    name = re.sub(r"[^A-Za-z0-9]", "_", reference).upper()
+    username = environ.get(f"SWITCH_CRED_{name}_USERNAME")
+    password = environ.get(f"SWITCH_CRED_{name}_PASSWORD")
+    if not username or not password:
+        raise KeyError(f"Credentials '{reference}' are not set. Define SWITCH_CRED_{name}_USERNAME "
+                       f"and SWITCH_CRED_{name}_PASSWORD.")
+    return username, password
+
+
+def build_inventory_devices(inventory, timeout=DEFAULT_DEVICE_TIMEOUT, environ=os.environ):
+    """
+    Turn inventory entries into device dictionaries for the collection engine.
+    """
+    devices = []
+    for entry in inventory:
+        transport = (entry.get('transport') or 'telnet').lower()
+        if transport not in ('ssh', 'telnet'):
+            raise ValueError(f"Unknown transport '{transport}' for {entry['host']}.")
+        profile = entry.get('profile') or 'full'
+        if profile not in COMMAND_PROFILES:
+            raise ValueError(f"Unknown command profile '{profile}' for {entry['host']}.")
+        username, password = resolve_credentials(entry.get('credentials') or 'default', environ)
+
+        device = build_device(entry['host'], username, password, transport == 'ssh', timeout)
+        device['commands'] = COMMAND_PROFILES[profile]
+        if entry.get('port'):
+            device['port'] = int(entry['port'])
+        devices.append(device)
+    return devices
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Collect switch outputs for every device in an inventory file.")
+    parser.add_argument("inventory", help="CSV or YAML inventory file.")
+    parser.add_argument("--output-dir", default=DEFAULT_OUTPUT_DIR, help="Folder the output files are written to.")
+    parser.add_argument("--workers", type=int,
+                        help=f"Number of switches collected at the same time (default {DEFAULT_MAX_WORKERS} "
+                             f"threads, or async_collector.DEFAULT_MAX_SESSIONS sessions with asyncio).")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_DEVICE_TIMEOUT,
+                        help="Seconds allowed for each switch.")
+    parser.add_argument("--backend", choices=("threads", "asyncio"), default="threads",
+                        help="Collection backend, 'asyncio' keeps many more switches in flight.")
+    parser.add_argument("--rules", help="Classification rules file (default classification_rules.json).")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only pull a running-config the switch reports as changed since the last run.")
+    parser.add_argument("--store", action="store_true",
+                        help="Move the output files into the deduplicating content store in the output folder.")
+    parser.add_argument("--compress", nargs="?", const="auto", choices=("auto",) + tuple(COMPRESSION_SUFFIXES),
+                        help="Compress output files as they are written (default zstd if available, else gzip).")
+    parser.add_argument("--records", action="store_true",
+                        help="Also load the parsed records into records.sqlite in the output folder "
+                             "(adds 'show cdp neighbors detail' to every switch's commands).")
+    args = parser.parse_args(argv)
+
+    if args.rules:
+        use_rules_file(args.rules)
+    try:
+        compression = available_compression(args.compress)
+    except ValueError as e:
+        parser.error(str(e))
+
+    try:
+        devices = build_inventory_devices(load_inventory(args.inventory), args.timeout)
+    except KeyError as e:
+        # Missing credentials: KeyError's str() would quote the message.
+        parser.error(e.args[0])
+    except (OSError, RuntimeError, ValueError) as e:
+        # An unreadable inventory, a YAML one without PyYAML, or a bad entry.
+        parser.error(str(e))
+    date_str = datetime.datetime.now().strftime('%Y%m%d')
+    os.makedirs(args.output_dir, exist_ok=True)
+    content_store = ContentStore(os.path.join(args.output_dir, STORE_DIRNAME)) if args.store else None
+    store_run = content_store.begin_run(date_str) if content_store is not None else None
+    fingerprints = FingerprintStore.for_output_dir(args.output_dir, content_store) if args.incremental else None
+    records = RecordIndex(os.path.join(args.output_dir, RECORDS_FILENAME)) if args.records else None
+    if records is not None:
+        for device in devices:
+            device['commands'] = [command for command in RECORD_COMMANDS
+                                  if command not in device['commands']] + device['commands']
+    summary_path = os.path.join(args.output_dir, f"{date_str}_collection_summary.csv")
+
+    failures = 0
+    with open(summary_path, "a", newline="") as summary_file:
+        summary = csv.writer(summary_file)
+        if summary_file.tell() == 0:
+            summary.writerow(["host", "status", "elapsed_seconds", "files", "error"])
+
+        def record(result):
+            nonlocal failures
+            if store_run is not None and result['files']:
+                try:
+                    store_run.add_files(result['host'], result['files'], remove=True)
+                except OSError as e:
+                    # Counted against this switch only; the rest of the run carries on.
+                    if result['error'] is None:
+                        result['error'] = e
+            status = "ok" if result['error'] is None else "failed"
+            if result['error'] is not None:
+                failures += 1
+            summary.writerow([result['host'], status, f"{result['elapsed']:.1f}",
+                              len(result['files']), result['error'] or ""])
+            summary_file.flush()
+            print(f"{result['host']}: {status} ({result['elapsed']:.1f}s)"
+                  + (f" - {result['error']}" if result['error'] is not None else ""))
+
+        if args.backend == "asyncio":
+            from async_collector import DEFAULT_MAX_SESSIONS, run_collect_switches_async
+            run_collect_switches_async(devices, args.output_dir, date_str,
+                                       max_sessions=args.workers or DEFAULT_MAX_SESSIONS,
+                                       timeout=args.timeout, on_result=record, fingerprints=fingerprints,
+                                       compression=compression, records=records)
+        else:
+            for result in iter_collect_switches(devices, args.output_dir, date_str,
+                                                max_workers=args.workers or DEFAULT_MAX_WORKERS,
+                                                timeout=args.timeout,
+                                                fingerprints=fingerprints, compression=compression,
+                                                records=records):
+                record(result)
+
+    print(f"{len(devices) - failures} of {len(devices)} switches collected. Summary: {summary_path}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,543 @@
+"""
+Collection engine for running the standard command set against one or many switches.
+
+The GUI in "Cisco Collect.py" uses collect_switch() for a single hostname, while
+collect_switches() runs a whole list of switches at the same time in a bounded
+pool of worker threads. Every switch gets its own timeout and its own result, so
+one unreachable closet switch does not stop (or hide) the rest of a site sweep.
+
+The processed reports (markers) and the raw commands they need come from the
+registry in processors.py.
+
+Raw output is streamed to disk in chunks as it arrives from the switch, and the
+processors read it back line by line, so memory use stays flat however large the
+running-config or MAC address table is.
+"""
+import concurrent.futures
+import contextlib
+import datetime
+import os
+import re
+import tempfile
+import time
+
+from netmiko import ConnectHandler
+
+from config_fingerprints import CHANGE_MARKER_COMMAND, is_running_config, parse_change_marker
+from output_files import atomic_output, with_compression
+from processors import PROCESSORS, required_commands, run_processor
+from text_parsing import read_lines
+
+DEFAULT_OUTPUT_DIR = r"C:\Cisco Output"
+
+# Default number of switches collected at the same time.
+DEFAULT_MAX_WORKERS = 8
+
+# Default time (in seconds) allowed for a single switch, from login to the last command.
+DEFAULT_DEVICE_TIMEOUT = 300
+
+# Default number of threads per switch running processors while later commands are fetched.
+DEFAULT_PROCESSOR_WORKERS = 4
+
+# Seconds to wait before polling the session again while command output is arriving.
+STREAM_POLL_INTERVAL = 0.05
+
+# ANSI escape codes: CSI sequences (colours, cursor movement) and character set selection.
+ANSI_ESCAPE_PATTERN = re.compile(r"\x1b\[[0-9;?]*[A-Za-z]|\x1b[()][A-Za-z0-9]|\x1b[=>]")
+
+# Define the list of commands (or markers) to execute.
+# "sh running-config" is added as the final command.
+COMMANDS = [
+    'show vlan',
+    'show auth sessions',
+    'process_cdp_neighbors',       # Special processing for CDP neighbors
+    'filter_int_status_10mb',      # Special processing for "show int status"
+    'process_mac_address_table',   # Special processing for MAC address table
+    'sh running-config'            # This command is executed last
+]
+
+# Named command profiles that an inventory file can pick per switch.
+COMMAND_PROFILES = {
+    'full': COMMANDS,
+    'quick': [command for command in COMMANDS if command != 'sh running-config'],
+    'config': ['sh running-config'],
+    # For core/distribution switches: the MAC address table report is built in bulk (see mac_table).
+    'core': [command if command != 'process_mac_address_table' else 'process_mac_address_table_bulk'
+             for command in COMMANDS],
+}
+
+class CollectionCancelled(Exception):
+    """
+    Raised when a collection is cancelled before all commands have run.
+    """
+
+
+def build_device(hostname, username, password, use_ssh=False, timeout=DEFAULT_DEVICE_TIMEOUT):
+    """
+    Build the netmiko device dictionary for a switch.
+
+    Parameters:
+        hostname (str): Switch hostname or IP address.
+        username (str): Login username.
+        password (str): Login password.
+        use_ssh (bool): True for SSH, False for Telnet.
+        timeout (float): Seconds allowed for the TCP connection and login.
+
+    Returns:
+        dict: Keyword arguments for netmiko's ConnectHandler.
+    """
+    device = {
+        'host': hostname,
+        'username': username,
+        'password': password,
+        'conn_timeout': timeout,
+        'auth_timeout': timeout,
+    }
+    if use_ssh:
+        device['device_type'] = 'cisco_ios'       # SSH connection
+    else:
+        device['device_type'] = 'cisco_ios_telnet'  # Telnet connection
+    return device
+
+
+def command_filename(command):
+    """
+    Return the filename portion used for a command or marker.
+
+    Markers use the filename registered for their processor, plain commands have
+    spaces, slashes and pipes made filename safe.
+    """
+    if command in PROCESSORS:
+        return PROCESSORS[command]['filename']
+    return command.replace(" ", "_").replace("/", "_").replace("|", "")
+
+
+def output_path(output_dir, hostname, date_str, command, compression=None):
+    """
+    Return the full path of the output file for a command on a switch.
+
+    With a compression ("zstd", "gzip", see output_files) its suffix is added after ".txt".
+    """
+    filename = f"{hostname}_{date_str}_{command_filename(command)}.txt"
+    return with_compression(os.path.join(output_dir, filename), compression)
+
+
+def write_lines(file_path, lines):
+    """
+    Write output lines to a file, one line at a time, and return the file path.
+
+    The lines are separated by newlines with no newline after the last one, the
+    same as writing "\n".join(lines). A ".gz" or ".zst" file is compressed as it is written.
+    The file only gets its name once every line is written (see output_files.atomic_output).
+    """
+    with atomic_output(file_path) as file:
+        separator = ""
+        for line in lines:
+            file.write(separator)
+            file.write(line)
+            separator = "\n"
+    return file_path
+
+
+class StreamingOutput:
+    """
+    Write a command's output to a file as it arrives from the switch.
+
+    Text is fed in chunks as it is read from the session. Complete lines are written
+    straight away, with ANSI escape codes stripped, the echoed command left out and
+    line endings normalised to "\n". Only the last, unfinished line is held back, so
+    that the switch prompt ending the output can be recognised and left out too.
+
+    Parameters:
+        file: Text file to write the output to.
+        command (str): The command that was sent, to recognise its echo.
+        prompt (str): The switch prompt, e.g. "SW-CLOSET-01#".
+        expect_string (str): Optional regex the last line is searched for to end the
+            output (like netmiko's send_command), instead of the exact prompt.
+        strip_ansi (callable): Removes ANSI escape codes from a str (default strip_ansi_codes).
+    """
+
+    def __init__(self, file, command, prompt, expect_string=None, strip_ansi=None):
+        self.file = file
+        self.command = command.strip()
+        self.prompt = prompt.strip()
+        self.expect = re.compile(expect_string if expect_string is not None else f"^{re.escape(self.prompt)}$")
+        self.strip_ansi = strip_ansi or strip_ansi_codes
+        self.tail = ""
+        self.first_line = True
+        self.separator = ""
+
+    def feed(self, text):
+        """
+        Add a chunk of output. Returns True once the prompt has been received.
+        """
+        text = self.tail + text
+        end = text.rfind("\n")
+        if end == -1:
+            self.tail = text
+        else:
+            self.tail = text[end + 1:]
+            # Escape codes are stripped from complete lines only, so one split across
+            # two chunks is still recognised.
+            lines = self.strip_ansi(text[:end]).replace("\r\n", "\n").replace("\r", "").split("\n")
+            if self.first_line:
+                self.first_line = False
+                if lines[0].strip() == self.command:
+                    lines = lines[1:]
+            for line in lines:
+                self.file.write(self.separator)
+                self.file.write(line)
+                self.separator = "\n"
+        return self.expect.search(self.strip_ansi(self.tail).replace("\r", "").strip()) is not None
+
+
+def strip_ansi_codes(text):
+    """
+    Remove ANSI escape codes (colours, cursor movement) from text.
+    """
+    return ANSI_ESCAPE_PATTERN.sub("", text)
+
+
+def prompt_pattern(prompt, base_prompt=None):
+    """
+    Return the regex ending a command's output: the base prompt (hostname, by
+    default the prompt without its last character) followed by ">" or "#", with
+    anything like "(config)" in between.
+    """
+    base_prompt = base_prompt or prompt.strip()[:-1]
+    return rf"^{re.escape(base_prompt)}[^\s>#]*[>#]$"
+
+
+def stream_command(net_connect, command, file, prompt, read_timeout, expect_string=None):
+    """
+    Send a command on a netmiko connection and stream its output into a file.
+
+    Each chunk is read with netmiko's read_channel() and has its ANSI escape codes
+    removed with netmiko's strip_ansi_escape_codes(). The output ends when the last
+    line matches expect_string (by default the switch's base prompt, see prompt_pattern).
+
+    Parameters:
+        net_connect: An open netmiko connection.
+        command (str): The raw CLI command to send.
+        file: Text file the output is written to as it arrives.
+        prompt (str): The switch prompt (from find_prompt()) that ends the output.
+        read_timeout (float): Seconds allowed for the whole output to arrive, checked
+            after every read, so a device that keeps sending is timed out too.
+        expect_string (str): Optional regex for the line ending the output.
+
+    Raises:
+        TimeoutError: If the output did not end within read_timeout.
+    """
+    deadline = time.monotonic() + read_timeout
+    if expect_string is None:
+        expect_string = prompt_pattern(prompt, getattr(net_connect, "base_prompt", None))
+    net_connect.write_channel(command + net_connect.RETURN)
+    output = StreamingOutput(file, command, prompt, expect_string,
+                             getattr(net_connect, "strip_ansi_escape_codes", None))
+    while True:
+        chunk = net_connect.read_channel()
+        if chunk and output.feed(chunk):
+            return
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"Timed out waiting for the output of '{command}'.")
+        if not chunk:
+            time.sleep(STREAM_POLL_INTERVAL)
+
+
+def remaining_time(deadline):
+    """
+    Return the seconds left before the deadline, raising TimeoutError once it has passed.
+    """
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise TimeoutError("Device timeout reached before all commands completed.")
+    return remaining
+
+
+def cli_key(command):
+    """
+    Return the cache key for a raw CLI command, ignoring case and extra spaces.
+    """
+    return " ".join(command.lower().split())
+
+
+class CommandCache:
+    """
+    Per-run record of the raw CLI output collected from one switch.
+
+    Each raw command is sent to the switch at most once per run. Its output is
+    kept in a file, and every processor that depends on it reads that file.
+
+    Parameters:
+        send (callable): Takes a raw CLI command, collects its output from the switch
+            into a file and returns the file path. May be None when every output is
+            added up front with store().
+    """
+
+    def __init__(self, send=None):
+        self.send = send
+        self.paths = {}
+
+    def fetch(self, command):
+        """
+        Return the path of the file holding the command's output, collecting it first if needed.
+        """
+        key = cli_key(command)
+        if key not in self.paths:
+            if self.send is None:
+                raise KeyError(f"No output collected for '{command}'.")
+            self.paths[key] = self.send(command)
+        return self.paths[key]
+
+    def store(self, command, file_path):
+        self.paths[cli_key(command)] = file_path
+
+    def lines(self, command):
+        """
+        Return an iterator over the lines of the command's output.
+        """
+        return read_lines(self.fetch(command))
+
+    def __contains__(self, command):
+        return cli_key(command) in self.paths
+
+    def __len__(self):
+        return len(self.paths)
+
+
+def raw_commands_for(commands):
+    """
+    Return the fetch plan for the given commands/markers: the raw CLI commands they
+    need, in order, with each underlying CLI command listed once.
+    """
+    raw_commands = {}
+    for command in commands:
+        for raw_command in required_commands(command):
+            raw_commands.setdefault(cli_key(raw_command), raw_command)
+    return list(raw_commands.values())
+
+
+def raw_output_paths(commands, output_dir, spool_dir, hostname, date_str, compression=None):
+    """
+    Return the file each raw command in the fetch plan is streamed into.
+
+    A raw command that is also in the command list as a plain command is streamed
+    straight into its output file (compressed if a compression is given). Raw commands
+    only needed by processors go to an uncompressed file in spool_dir.
+
+    Returns:
+        dict: Raw CLI command -> file path.
+    """
+    plain_paths = {}
+    for command in commands:
+        if command not in PROCESSORS:
+            plain_paths.setdefault(cli_key(command),
+                                   output_path(output_dir, hostname, date_str, command, compression))
+
+    paths = {}
+    for raw_command in raw_commands_for(commands):
+        paths[raw_command] = plain_paths.get(cli_key(raw_command)) or os.path.join(
+            spool_dir, command_filename(raw_command) + ".txt")
+    return paths
+
+
+@contextlib.contextmanager
+def open_connection(device, pool=None):
+    """
+    Context manager yielding a connection to the switch, from the pool if one is given.
+    """
+    if pool is not None:
+        with pool.session(device) as net_connect:
+            yield net_connect
+        return
+    net_connect = ConnectHandler(**device)
+    try:
+        yield net_connect
+    finally:
+        net_connect.disconnect()
+
+
+def collect_switch(device, output_dir=DEFAULT_OUTPUT_DIR, date_str=None, commands=None,
+                   timeout=DEFAULT_DEVICE_TIMEOUT, progress=None, cancel_event=None, pool=None,
+                   processor_workers=DEFAULT_PROCESSOR_WORKERS, fingerprints=None, compression=None,
+                   records=None):
+    """
+    Log onto one switch, run every command and write each output to its own file.
+
+    The raw CLI commands in the fetch plan (see raw_commands_for) are sent one at a
+    time over the session and their output is streamed to disk as it arrives. As soon
+    as every raw output a processor needs has arrived, it is handed to a small thread
+    pool to be processed and written, so processing overlaps with waiting on the
+    switch for the remaining commands.
+
+    With a fingerprint store, the switch is first asked for its last configuration
+    change stamp, and the running-config is only pulled if that has changed since the
+    last full pull; otherwise the previous config file is copied (see config_fingerprints).
+
+    Parameters:
+        device (dict): netmiko device dictionary (see build_device).
+        output_dir (str): Folder the output files are written to.
+        date_str (str): Date part of the filenames, defaults to today (YYYYMMDD).
+        commands (list): Commands/markers to run, defaults to COMMANDS. A 'commands'
+            entry in the device dictionary (e.g. from an inventory profile) takes priority.
+        timeout (float): Seconds allowed for the whole switch. Connecting and logging in
+            get at most this (as netmiko's conn_timeout and auth_timeout), and each raw
+            CLI command gets whatever is left of it as its read timeout.
+        progress (callable): Optional, called as progress(done, total, command) before
+            each raw CLI command is sent and once more (with done == total) at the end.
+        cancel_event (threading.Event): Optional, checked before each raw command; when set
+            the collection stops with CollectionCancelled.
+        pool (ConnectionPool): Optional, reuse a logged-in session from this pool and
+            return it afterwards instead of connecting and disconnecting.
+        processor_workers (int): Threads used to process and write outputs.
+        fingerprints (FingerprintStore): Optional, skip pulling an unchanged running-config.
+        compression (str): Optional, "zstd" or "gzip" to compress the output files as they
+            are written (see output_files).
+        records (RecordIndex): Optional, also load the parsed records of the raw outputs
+            into this database (see record_index).
+
+    Returns:
+        list: Paths of the files created, in command order.
+
+    Raises:
+        TimeoutError: If the switch did not finish within the timeout.
+        CollectionCancelled: If cancel_event was set.
+        Exception: Any connection or command error raised by netmiko.
+    """
+    deadline = time.monotonic() + timeout
+    if date_str is None:
+        date_str = datetime.datetime.now().strftime('%Y%m%d')
+    device = dict(device)
+    commands = device.pop('commands', None) or commands or COMMANDS
+    os.makedirs(output_dir, exist_ok=True)
+
+    plan = raw_commands_for(commands)
+    waiting = [command for command in dict.fromkeys(commands) if command in PROCESSORS]
+    futures = {}
+
+    def process_and_write(command):
+        file_path = output_path(output_dir, device['host'], date_str, command, compression)
+        return write_lines(file_path, run_processor(command, cache.lines))
+
+    # Connecting and logging in also count against the switch's timeout.
+    for connect_timeout in ('conn_timeout', 'auth_timeout'):
+        device[connect_timeout] = min(device.get(connect_timeout, timeout), remaining_time(deadline))
+
+    with tempfile.TemporaryDirectory(prefix=".spool_", dir=output_dir) as spool_dir, \
+            open_connection(device, pool) as net_connect, \
+            concurrent.futures.ThreadPoolExecutor(max_workers=processor_workers) as executor:
+        paths = raw_output_paths(commands, output_dir, spool_dir, device['host'], date_str, compression)
+        prompt = net_connect.find_prompt()
+
+        def stream_to(cli_command, file_path):
+            # Written under a temporary name, so a timeout never leaves a partial output file.
+            with atomic_output(file_path) as file:
+                stream_command(net_connect, cli_command, file, prompt, remaining_time(deadline))
+            return file_path
+
+        def send(cli_command):
+            if fingerprints is None or not is_running_config(cli_command):
+                return stream_to(cli_command, paths[cli_command])
+            marker_path = stream_to(CHANGE_MARKER_COMMAND, os.path.join(spool_dir, "config_change_marker.txt"))
+            marker = parse_change_marker(read_lines(marker_path))
+            if not fingerprints.reuse(device['host'], marker, paths[cli_command]):
+                stream_to(cli_command, paths[cli_command])
+                fingerprints.record(device['host'], marker, paths[cli_command])
+            return paths[cli_command]
+
+        cache = CommandCache(send)
+        for index, raw_command in enumerate(plan):
+            if cancel_event is not None and cancel_event.is_set():
+                raise CollectionCancelled(f"Collection of {device['host']} was cancelled.")
+            if progress is not None:
+                progress(index, len(plan), raw_command)
+            cache.fetch(raw_command)
+
+            # Start every processor whose raw outputs have now all arrived.
+            for command in list(waiting):
+                if all(required in cache for required in required_commands(command)):
+                    waiting.remove(command)
+                    futures[command] = executor.submit(process_and_write, command)
+        if records is not None:
+            loading = executor.submit(records.load_outputs, device['host'], date_str, dict(cache.paths))
+
+        output_files = []
+        for command in dict.fromkeys(commands):
+            if command in futures:
+                output_files.append(futures[command].result())
+            else:
+                output_files.append(cache.fetch(command))
+        if records is not None:
+            loading.result()
+    if progress is not None:
+        progress(len(plan), len(plan), None)
+    return output_files
+
+
+def iter_collect_switches(devices, output_dir=DEFAULT_OUTPUT_DIR, date_str=None, commands=None,
+                          max_workers=DEFAULT_MAX_WORKERS, timeout=DEFAULT_DEVICE_TIMEOUT, pool=None,
+                          fingerprints=None, compression=None, records=None):
+    """
+    Collect a list of switches concurrently, yielding each result as soon as that switch finishes.
+
+    Each result is a dictionary:
+        {'host': str, 'index': position in devices, 'files': list of paths,
+         'error': Exception or None, 'elapsed': seconds}
+
+    A failure on one switch is reported in its own result and never stops the others.
+    With a FingerprintStore, unchanged running-configs are not pulled again, with a
+    compression the output files are compressed as they are written, and with a
+    RecordIndex the parsed records are loaded into it too (see collect_switch).
+    """
+    if date_str is None:
+        date_str = datetime.datetime.now().strftime('%Y%m%d')
+
+    def collect(index, device):
+        start = time.monotonic()
+        try:
+            files = collect_switch(device, output_dir, date_str, commands, timeout, pool=pool,
+                                   fingerprints=fingerprints, compression=compression, records=records)
+            error = None
+        except Exception as e:
+            files = []
+            error = e
+        return {
+            'host': device['host'],
+            'index': index,
+            'files': files,
+            'error': error,
+            'elapsed': time.monotonic() - start,
+        }
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(collect, index, device) for index, device in enumerate(devices)]
+        for future in concurrent.futures.as_completed(futures):
+            yield future.result()
+
+
+def collect_switches(devices, output_dir=DEFAULT_OUTPUT_DIR, date_str=None, commands=None,
+                     max_workers=DEFAULT_MAX_WORKERS, timeout=DEFAULT_DEVICE_TIMEOUT, pool=None,
+                     fingerprints=None, compression=None, records=None):
+    """
+    Collect a list of switches concurrently and return one result per switch.
+
+    Results are returned in the same order as the devices list, one per entry even
+    if a host is listed twice. See iter_collect_switches for the layout of each result.
+    """
+    devices = list(devices)
+    results = [None] * len(devices)
+    for result in iter_collect_switches(devices, output_dir, date_str, commands, max_workers, timeout, pool,
+                                        fingerprints, compression, records):
+        results[result['index']] = result
+    return results
+
+
+def connection_error_hint(device, error):
+    """
+    Return a suggestion to append to a connection error message, or an empty string.
+    """
+    error_msg = str(error).lower()
+    # If the error message indicates connection refusal and SSH isn't enabled, suggest using SSH.
+    if device.get('device_type') == 'cisco_ios_telnet' and "actively refused" in error_msg:
+        return "\nIt appears that the switch may require SSH connectivity. Please try checking the 'Use SSH' option."
+    return ""
@@ -0,0 +1,219 @@
+"""
+Skip pulling an unchanged running-config.
+
+IOS stamps the running configuration with the time of the last change:
+
+    ! Last configuration change at 09:12:44 UTC Tue Oct 13 2026 by admin
+
+Asking for just that line ('show running-config | include Last configuration
+change') is a single line over the wire, against hundreds of KB for the whole
+config. FingerprintStore keeps, per switch, the last stamp seen together with the
+SHA-256 of the config file pulled at that time. When the switch reports the same
+stamp on the next run and the earlier file is still on disk with the same hash
+(or its contents are in the content store, see output_store), that is copied to
+today's output file instead of pulling the config again.
+
+    store = FingerprintStore.for_output_dir(output_dir)
+    if not store.reuse(host, marker, config_path):
+        ...pull the config into config_path...
+        store.record(host, marker, config_path)
+
+A switch that prints no stamp (e.g. an old release) always gets a full pull.
+"""
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+
+from output_files import copy_output, open_input
+
+# Sent before the running-config to read the switch's last change stamp.
+CHANGE_MARKER_COMMAND = "show running-config | include Last configuration change"
+
+# The stamp line; the time and the user who made the change are kept as the marker.
+CHANGE_MARKER_PATTERN = re.compile(r"!\s*Last configuration change at\s+(.+?)\s*$")
+
+# Name of the fingerprint store in the output folder.
+FINGERPRINTS_FILENAME = ".config_fingerprints.json"
+
+# Bump when the layout of the store changes; older stores are ignored.
+FINGERPRINTS_FORMAT = 1
+
+# Bytes read at a time when hashing a file.
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def is_running_config(command):
+    """
+    Return True if a raw CLI command is a (possibly abbreviated) 'show running-config'.
+    """
+    words = command.lower().split()
+    return (len(words) == 2 and len(words[0]) >= 2 and "show".startswith(words[0])
+            and len(words[1]) >= 3 and "running-config".startswith(words[1]))
+
+
+def parse_change_marker(lines):
+    """
+    Return the last configuration change stamp from the output of CHANGE_MARKER_COMMAND,
+    e.g. "09:12:44 UTC Tue Oct 13 2026 by admin", or None if there is none.
+    """
+    for line in lines:
+        match = CHANGE_MARKER_PATTERN.search(line)
+        if match is not None:
+            return match.group(1)
+    return None
+
+
+def file_sha256(file_path):
+    """
+    Return the SHA-256 hex digest of a file's contents, read in chunks.
+
+    A compressed output file is hashed on its uncompressed contents, so the hash does
+    not depend on the compression used (and matches the content store's).
+    """
+    digest = hashlib.sha256()
+    with open_input(file_path, "rb") as file:
+        for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _has_contents(file_path, sha256):
+    try:
+        return file_sha256(file_path) == sha256
+    except OSError:
+        return False
+
+
+class ConfigFingerprint:
+    """
+    What was known about a switch's running-config after its last full pull.
+
+    Attributes:
+        marker (str): The last configuration change stamp reported at the time.
+        sha256 (str): Hex digest of the config file.
+        path (str): The config file that was written.
+    """
+    __slots__ = ("marker", "sha256", "path")
+
+    def __init__(self, marker, sha256, path):
+        self.marker = marker
+        self.sha256 = sha256
+        self.path = path
+
+    def __repr__(self):
+        return f"ConfigFingerprint({self.marker!r}, {self.sha256!r}, {self.path!r})"
+
+
+class FingerprintStore:
+    """
+    Per-switch config fingerprints, kept in a JSON file.
+
+    The file is rewritten (atomically) every time a fingerprint is recorded, so an
+    interrupted run keeps the fingerprints of the switches it finished. Safe to use
+    from several collection threads at once.
+
+    Parameters:
+        path (str): The JSON file. It is created on the first record() if missing.
+        content_store (ContentStore): Optional, where to find a config whose file has
+            been moved into the content store (see output_store).
+    """
+
+    def __init__(self, path, content_store=None):
+        self.path = path
+        self.content_store = content_store
+        self._lock = threading.Lock()
+        self._fingerprints = self._load()
+
+    @classmethod
+    def for_output_dir(cls, output_dir, content_store=None):
+        """
+        Return the store kept in an output folder.
+        """
+        return cls(os.path.join(output_dir, FINGERPRINTS_FILENAME), content_store)
+
+    def _load(self):
+        try:
+            with open(self.path) as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            # No store yet, or an unreadable one: every switch gets a full pull.
+            return {}
+        if not isinstance(data, dict) or data.get("format") != FINGERPRINTS_FORMAT:
+            return {}
+        return {host: ConfigFingerprint(entry["marker"], entry["sha256"], entry["path"])
+                for host, entry in data.get("switches", {}).items()}
+
+    def _save(self):
+        data = {
+            "format": FINGERPRINTS_FORMAT,
+            "switches": {host: {"marker": fingerprint.marker, "sha256": fingerprint.sha256,
+                                "path": fingerprint.path}
+                         for host, fingerprint in sorted(self._fingerprints.items())},
+        }
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, temp_path = tempfile.mkstemp(prefix=".fingerprints_", suffix=".tmp", dir=directory)
+        try:
+            with os.fdopen(fd, "w") as file:
+                json.dump(data, file, indent=2)
+            os.replace(temp_path, self.path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+    def get(self, host):
+        """
+        Return the ConfigFingerprint recorded for a switch, or None.
+        """
+        with self._lock:
+            return self._fingerprints.get(host)
+
+    def reuse(self, host, marker, file_path):
+        """
+        Put the previously pulled config in file_path if the switch reports no change since.
+
+        Parameters:
+            host (str): The switch.
+            marker (str): The change stamp the switch reports now (None if it printed none).
+            file_path (str): Where the running-config output is to be written.
+
+        Returns:
+            bool: True if file_path now holds the unchanged config, False if it must be pulled.
+        """
+        fingerprint = self.get(host)
+        if marker is None or fingerprint is None or fingerprint.marker != marker:
+            return False
+        file_path = os.path.abspath(file_path)
+        try:
+            if _has_contents(fingerprint.path, fingerprint.sha256):
+                if fingerprint.path != file_path:
+                    copy_output(fingerprint.path, file_path)
+            elif self.content_store is not None and fingerprint.sha256 in self.content_store:
+                # The earlier file has been moved into the content store since.
+                self.content_store.copy_to(fingerprint.sha256, file_path)
+            else:
+                # Removed, edited or truncated since it was written.
+                return False
+        except OSError:
+            return False
+        # Follow the newest copy, so older output files can be cleaned up.
+        with self._lock:
+            self._fingerprints[host] = ConfigFingerprint(marker, fingerprint.sha256, file_path)
+            self._save()
+        return True
+
+    def record(self, host, marker, file_path):
+        """
+        Record the fingerprint of a config just pulled into file_path.
+
+        Nothing is recorded when the switch reported no change stamp, as there would be
+        nothing to compare against on the next run.
+        """
+        if marker is None:
+            return
+        fingerprint = ConfigFingerprint(marker, file_sha256(file_path), os.path.abspath(file_path))
+        with self._lock:
+            self._fingerprints[host] = fingerprint
+            self._save()
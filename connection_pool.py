@@ -0,0 +1,152 @@
+"""
+Pool of logged-in switch sessions that are kept open between collections.
+
+Opening a netmiko connection pays for the TCP connect, the login, prompt
+discovery and "terminal length 0" every time. The pool keeps sessions open after
+a collection, keyed by (host, transport, username, port), so a repeat run against
+the same switch starts straight away.
+
+Sessions that have been idle for longer than idle_timeout are closed, a session
+is health-checked with is_alive() before it is handed out again, and when more
+than max_size sessions are idle the least recently used one is closed.
+"""
+import collections
+import contextlib
+import threading
+import time
+
+from netmiko import ConnectHandler
+
+# Default seconds an unused session is kept open. Switches usually drop idle
+# vty sessions after 10 minutes (exec-timeout), so stay below that.
+DEFAULT_IDLE_TIMEOUT = 300
+
+# Default maximum number of idle sessions kept open.
+DEFAULT_MAX_SIZE = 16
+
+
+def session_key(device):
+    """
+    Return the pool key for a netmiko device dictionary.
+    """
+    return (device['host'], device.get('device_type'), device.get('username'), device.get('port'))
+
+
+class ConnectionPool:
+    """
+    Thread-safe, LRU-evicting pool of idle netmiko connections.
+
+    A session is only ever used by one caller at a time: acquire() takes it out of
+    the pool and release() puts it back.
+    """
+
+    def __init__(self, idle_timeout=DEFAULT_IDLE_TIMEOUT, max_size=DEFAULT_MAX_SIZE, connect=ConnectHandler):
+        self.idle_timeout = idle_timeout
+        self.max_size = max_size
+        self.connect = connect
+        # key -> (connection, time it was released), least recently used first.
+        self._idle = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def acquire(self, device):
+        """
+        Return a healthy connection for the device, reusing an idle one when possible.
+        """
+        stale = self._take_expired()
+        with self._lock:
+            entry = self._idle.pop(session_key(device), None)
+        for connection in stale:
+            self._disconnect(connection)
+
+        if entry is not None:
+            connection, _ = entry
+            if self._is_alive(connection):
+                return connection
+            self._disconnect(connection)
+        return self.connect(**device)
+
+    def release(self, device, connection):
+        """
+        Put a connection back in the pool for reuse, closing the least recently used if the pool is full.
+        """
+        key = session_key(device)
+        evicted = []
+        with self._lock:
+            previous = self._idle.pop(key, None)
+            if previous is not None:
+                evicted.append(previous[0])
+            self._idle[key] = (connection, time.monotonic())
+            while len(self._idle) > self.max_size:
+                _, (old_connection, _) = self._idle.popitem(last=False)
+                evicted.append(old_connection)
+        for old_connection in evicted:
+            self._disconnect(old_connection)
+
+    def discard(self, connection):
+        """
+        Close a connection that should not be reused (e.g. after an error).
+        """
+        self._disconnect(connection)
+
+    @contextlib.contextmanager
+    def session(self, device):
+        """
+        Context manager that acquires a connection and releases it afterwards.
+
+        If the block raises, the connection is closed instead of being returned to the pool.
+        """
+        connection = self.acquire(device)
+        try:
+            yield connection
+        except BaseException:
+            self.discard(connection)
+            raise
+        self.release(device, connection)
+
+    def evict_expired(self):
+        """
+        Close every idle session that has been unused for longer than idle_timeout.
+        """
+        for connection in self._take_expired():
+            self._disconnect(connection)
+
+    def close_all(self):
+        """
+        Close every idle session in the pool.
+        """
+        with self._lock:
+            entries = list(self._idle.values())
+            self._idle.clear()
+        for connection, _ in entries:
+            self._disconnect(connection)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._idle)
+
+    def _take_expired(self):
+        cutoff = time.monotonic() - self.idle_timeout
+        expired = []
+        with self._lock:
+            # Entries are in release order, so expired ones are at the front.
+            while self._idle:
+                key, (connection, released) = next(iter(self._idle.items()))
+                if released > cutoff:
+                    break
+                del self._idle[key]
+                expired.append(connection)
+        return expired
+
+    @staticmethod
+    def _is_alive(connection):
+        try:
+            return connection.is_alive()
+        except Exception:
+            return False
+
+    @staticmethod
+    def _disconnect(connection):
+        try:
+            connection.disconnect()
+        except Exception:
+            pass
@@ -0,0 +1,117 @@
+"""
+A small fake Cisco IOS CLI served over Telnet-style TCP, for trying out the
+collectors without a real switch.
+
+It asks for a username and password, shows a "hostname#" prompt, echoes each
+command and answers it from a dictionary of canned outputs. Unknown commands get
+the usual "% Invalid input" error.
+
+Run it from the command line with a folder of canned outputs, one file per command
+named like the collector output files (e.g. "show_vlan.txt", "show_int_trunk.txt"):
+
+    python fake_cisco_server.py --port 2323 --outputs-dir samples
+
+or start it from Python with start_fake_server().
+"""
+import argparse
+import asyncio
+import os
+
+INVALID_INPUT = "% Invalid input detected at '^' marker."
+
+
+def load_outputs(outputs_dir):
+    """
+    Load canned command outputs from a folder, keyed by command ("show_vlan.txt" -> "show vlan").
+    """
+    outputs = {}
+    for filename in os.listdir(outputs_dir):
+        if not filename.endswith(".txt"):
+            continue
+        command = filename[:-len(".txt")].replace("_", " ")
+        with open(os.path.join(outputs_dir, filename)) as file:
+            outputs[command] = file.read()
+    return outputs
+
+
+async def _read_line(reader):
+    line = await reader.readline()
+    if not line:
+        raise ConnectionError("Client disconnected.")
+    return line.decode(errors="replace").strip()
+
+
+async def start_fake_server(outputs, host="127.0.0.1", port=0, hostname="FAKE-SW01",
+                            username="admin", password="admin"):
+    """
+    Start the fake switch and return the asyncio server.
+
+    Parameters:
+        outputs (dict): Canned output for each command, e.g. {"show vlan": "..."}.
+        port (int): TCP port to listen on, 0 picks a free port
+            (see server.sockets[0].getsockname()[1]).
+
+    Returns:
+        asyncio.Server: The running server, close it with server.close().
+    """
+    prompt = f"{hostname}#"
+
+    async def handle(reader, writer):
+        try:
+            # Login until the right credentials are given.
+            writer.write(b"\r\nUser Access Verification\r\n\r\n")
+            while True:
+                writer.write(b"Username: ")
+                entered_username = await _read_line(reader)
+                writer.write(b"Password: ")
+                entered_password = await _read_line(reader)
+                if entered_username == username and entered_password == password:
+                    break
+                writer.write(b"% Login invalid\r\n\r\n")
+
+            writer.write(f"\r\n{prompt}".encode())
+            while True:
+                command = await _read_line(reader)
+                if command in ("exit", "logout", "quit"):
+                    break
+                if not command or command == "terminal length 0":
+                    output = ""
+                else:
+                    output = outputs.get(command, INVALID_INPUT)
+                # Echo the command like a real switch, then the output and the prompt.
+                body = output.replace("\r\n", "\n").replace("\n", "\r\n")
+                if body and not body.endswith("\r\n"):
+                    body += "\r\n"
+                writer.write(f"{command}\r\n{body}{prompt}".encode())
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, host, port)
+
+
+async def _serve_forever(outputs, host, port, hostname, username, password):
+    server = await start_fake_server(outputs, host, port, hostname, username, password)
+    print(f"Fake switch {hostname} listening on {host}:{server.sockets[0].getsockname()[1]}")
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Cisco IOS CLI for testing the collectors.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=2323)
+    parser.add_argument("--hostname", default="FAKE-SW01")
+    parser.add_argument("--username", default="admin")
+    parser.add_argument("--password", default="admin")
+    parser.add_argument("--outputs-dir", required=True, help="Folder of canned outputs, one .txt per command.")
+    args = parser.parse_args()
+
+    outputs = load_outputs(args.outputs_dir)
+    asyncio.run(_serve_forever(outputs, args.host, args.port, args.hostname, args.username, args.password))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""
+Canonical IOS / IOS-XE interface names.
+
+The same port is written differently depending on the command and platform:
+"Gi1/0/1" in 'show int trunk', "GigabitEthernet1/0/1" in the MAC table on some
+platforms, "Gig 1/0/1" in 'show cdp neighbors'. InterfaceNameNormalizer turns any
+of these into the full name, e.g. "GigabitEthernet1/0/1", so outputs of different
+commands can be compared.
+
+The interface type is looked up in a prefix trie of every known type name. Like
+the IOS CLI, any unambiguous prefix is accepted ("Gig", "Giga", "GigabitE"...), and
+the abbreviations IOS itself prints ("Tw" for TwoGigabitEthernet, "Twe" for
+TwentyFiveGigE, "Fo" for FortyGigabitEthernet, ...) are added as explicit entries,
+since they are not unambiguous prefixes. Results are kept in a bounded LRU cache,
+as the same few hundred port names come up again and again in a MAC table.
+"""
+import functools
+import re
+
+# Full interface type names, as used in the running configuration.
+INTERFACE_TYPES = (
+    "Ethernet", "FastEthernet", "GigabitEthernet", "TwoGigabitEthernet", "FiveGigabitEthernet",
+    "TenGigabitEthernet", "TwentyFiveGigE", "FortyGigabitEthernet", "FiftyGigE", "HundredGigE",
+    "TwoHundredGigE", "FourHundredGigE", "AppGigabitEthernet", "Wlan-GigabitEthernet", "Port-channel",
+    "Vlan", "Loopback", "Tunnel", "Serial", "Multilink", "Dialer", "Virtual-Access", "Virtual-Template",
+    "BDI", "Cellular", "Async", "Bluetooth",
+)
+
+# Abbreviations printed by IOS that are not unambiguous prefixes of a type name
+# (or that are, but are listed here to document them).
+INTERFACE_ABBREVIATIONS = {
+    "Et": "Ethernet",
+    "Fa": "FastEthernet",
+    "Gi": "GigabitEthernet",
+    "Tw": "TwoGigabitEthernet",
+    "Two": "TwoGigabitEthernet",
+    "Fi": "FiveGigabitEthernet",
+    "Te": "TenGigabitEthernet",
+    "Twe": "TwentyFiveGigE",
+    "Fo": "FortyGigabitEthernet",
+    "Hu": "HundredGigE",
+    "TH": "TwoHundredGigE",
+    "FH": "FourHundredGigE",
+    "Ap": "AppGigabitEthernet",
+    "Po": "Port-channel",
+    "Vl": "Vlan",
+    "Lo": "Loopback",
+    "Tu": "Tunnel",
+    "Se": "Serial",
+    "Mu": "Multilink",
+    "Di": "Dialer",
+    "Vi": "Virtual-Access",
+    "Vt": "Virtual-Template",
+    "Ce": "Cellular",
+}
+
+# Default number of names kept in each normalizer's cache.
+DEFAULT_CACHE_SIZE = 4096
+
+# An interface name: letters (and dashes) for the type, optional spaces, then the number.
+INTERFACE_PATTERN = re.compile(r"([A-Za-z][A-Za-z-]*?)\s*(\d.*)")
+
+
+class _TrieNode:
+    __slots__ = ("children", "canonical")
+
+    def __init__(self):
+        self.children = {}
+        # Type name this prefix resolves to: None if no type has been added under it yet,
+        # False once two different types share the prefix.
+        self.canonical = None
+
+
+class InterfaceNameNormalizer:
+    """
+    Expand interface names to their full, canonical form.
+
+    Parameters:
+        aliases (iterable): Extra (abbreviation, full type name) pairs, e.g. from the rules file.
+            They take precedence over the built-in ones.
+        cache_size (int): Maximum number of names kept in the LRU cache.
+    """
+
+    def __init__(self, aliases=(), cache_size=DEFAULT_CACHE_SIZE):
+        self._root = _TrieNode()
+        for type_name in INTERFACE_TYPES:
+            self._insert(type_name, type_name, explicit=False)
+        for abbreviation, type_name in list(INTERFACE_ABBREVIATIONS.items()) + list(aliases):
+            self._insert(abbreviation, type_name, explicit=True)
+        self._cached_normalize = functools.lru_cache(maxsize=cache_size)(self._normalize)
+
+    def _insert(self, name, type_name, explicit):
+        node = self._root
+        for char in name.lower():
+            node = node.children.setdefault(char, _TrieNode())
+            if not explicit:
+                # Every prefix of a type name resolves to it, until a second type shares the prefix.
+                node.canonical = type_name if node.canonical in (None, type_name) else False
+        if explicit:
+            node.canonical = type_name
+
+    def interface_type(self, text):
+        """
+        Return the full type name for an interface type or abbreviation ("Gi", "Gig", "gigabitethernet"),
+        or None if it is unknown or ambiguous.
+        """
+        node = self._root
+        for char in text.lower():
+            node = node.children.get(char)
+            if node is None:
+                return None
+        return node.canonical or None
+
+    def normalize(self, interface):
+        """
+        Return the canonical name of an interface, e.g. "Gi1/0/1" or "Gig 1/0/1" -> "GigabitEthernet1/0/1".
+
+        Names that are not interfaces ("CPU", "Router") or of an unknown type are returned unchanged.
+        """
+        return self._cached_normalize(interface)
+
+    def _normalize(self, interface):
+        match = INTERFACE_PATTERN.fullmatch(interface.strip())
+        if match is None:
+            return interface
+        type_name = self.interface_type(match.group(1))
+        if type_name is None:
+            return interface
+        return type_name + match.group(2)
+
+
+_default_normalizer = InterfaceNameNormalizer()
+
+
+def canonical_interface_name(interface):
+    """
+    Return the canonical name of an interface using the built-in abbreviations.
+    """
+    return _default_normalizer.normalize(interface)
+
+
+class PortIds:
+    """
+    Intern interface names as small integers, one per canonical name.
+
+    "Gi1/0/1", "Gig 1/0/1" and "GigabitEthernet1/0/1" all get the same ID, so ports
+    read from different commands can be compared with an int-set lookup. Each name is
+    normalized only the first time it is seen.
+
+    Parameters:
+        normalize (callable): Turns a name into its canonical form (default canonical_interface_name).
+
+    Attributes:
+        names (list): Canonical name of each ID.
+    """
+
+    def __init__(self, normalize=canonical_interface_name):
+        self.normalize = normalize
+        self.names = []
+        # Canonical name -> ID, and name as shown -> ID.
+        self._ids = {}
+        self._seen = {}
+
+    def port_id(self, name):
+        """
+        Return the ID of an interface name, assigning a new one for a new canonical name.
+        """
+        port_id = self._seen.get(name)
+        if port_id is None:
+            canonical = self.normalize(name)
+            port_id = self._ids.get(canonical)
+            if port_id is None:
+                port_id = self._ids[canonical] = len(self.names)
+                self.names.append(canonical)
+            self._seen[name] = port_id
+        return port_id
+
+    def port_ids(self, names):
+        """
+        Return the set of IDs of the given interface names.
+        """
+        return {self.port_id(name) for name in names}
+
+    def __len__(self):
+        return len(self.names)
@@ -0,0 +1,279 @@
+"""
+Find the access port of a MAC address by following the MAC tables across switches.
+
+The MAC address table report splits each switch's entries into local ones and
+remote ones (learned on a trunk). To find where a device is plugged in, start at
+any switch that has its address: if the entry is remote, the CDP neighbor on that
+trunk (or on a member of that port-channel) is the next switch to look at; the
+switch with a local entry has the access port.
+
+    locator = MacLocator(RecordIndex("records.sqlite"))
+    location = locator.locate("0011.2233.4455", start="SW-CORE01")
+    location.edge        # LocatorHop('SW-CLOSET-07', 20, 'Gi1/0/14', 'local', None)
+
+Everything is read from the record index (see record_index), never from the text
+outputs. A neighbor is matched to a collected switch on its CDP device ID (hostname)
+or, for switches inventoried by management IP, on its IP address, which only
+'show cdp neighbors detail' gives (collect_cli --records collects it). Each switch's MAC table, CDP neighbors and port-channel members are turned
+into dicts the first time the walk reaches that switch, and kept, so every further
+step and every further lookup is a few dict lookups. Only the latest collection of
+each switch is used.
+
+Command line:
+
+    python mac_locator.py /srv/cisco-output/records.sqlite 0011.2233.4455 --start SW-CORE01
+"""
+import argparse
+import sys
+
+from process_mac_address_table import format_mac, mac_to_int
+from record_index import RecordIndex
+
+# CDP categories (see classification_rules) of devices that connect end hosts on a
+# trunk port; an address learned on a trunk to one of these is located at that port.
+END_DEVICE_CATEGORIES = ("wap", "phone")
+
+
+def host_key(name):
+    """
+    Return the key a switch is matched on: lower case, without a domain or a
+    "(serial number)" suffix ("SW-CORE01.example.com" -> "sw-core01"). IP addresses
+    are kept whole.
+    """
+    name = name.split("(")[0].strip().lower()
+    if name.replace(".", "").isdigit():
+        return name
+    return name.split(".")[0]
+
+
+class SwitchTables:
+    """
+    Hash indexes of one switch's latest collection.
+
+    Attributes:
+        host (str): The switch.
+        date (str): Date of the collection.
+        macs (dict): MAC address (int) -> list of (vlan, port, interface, learned) tuples.
+        neighbors (dict): Canonical local interface -> (device ID, neighbor port, IP address, category).
+        channel_members (dict): Canonical Port-channel name -> list of canonical member interfaces.
+    """
+    __slots__ = ("host", "date", "macs", "neighbors", "channel_members")
+
+    def __init__(self, host, date):
+        self.host = host
+        self.date = date
+        self.macs = {}
+        self.neighbors = {}
+        self.channel_members = {}
+
+    def neighbor(self, interface):
+        """
+        Return the CDP neighbor on an interface, looking at the members of a port-channel
+        (where CDP runs), or None.
+        """
+        neighbor = self.neighbors.get(interface)
+        if neighbor is None:
+            for member in self.channel_members.get(interface, ()):
+                neighbor = self.neighbors.get(member)
+                if neighbor is not None:
+                    break
+        return neighbor
+
+
+class LocatorHop:
+    """
+    One switch on the way to a MAC address.
+
+    Attributes:
+        host (str): The switch.
+        vlan (int): VLAN of the entry, or None for "All".
+        port (str): Port the address is learned on, as shown in the MAC table.
+        learned (str): "local", "remote", "skipped" (the switch's own address), or None
+            if the switch's trunks were not collected.
+        neighbor (str): Device ID of the CDP neighbor on that port, if any.
+    """
+    __slots__ = ("host", "vlan", "port", "learned", "neighbor")
+
+    def __init__(self, host, vlan, port, learned, neighbor=None):
+        self.host = host
+        self.vlan = vlan
+        self.port = port
+        self.learned = learned
+        self.neighbor = neighbor
+
+    def __repr__(self):
+        return f"LocatorHop({self.host!r}, {self.vlan!r}, {self.port!r}, {self.learned!r}, {self.neighbor!r})"
+
+
+class MacLocation:
+    """
+    The result of a lookup.
+
+    Attributes:
+        mac (int): The MAC address as a 48-bit integer.
+        hops (list): LocatorHop for each switch visited, in order.
+        edge (LocatorHop): The hop with the access port, or None if it was not found.
+        reason (str): "found", or why the walk stopped.
+    """
+    __slots__ = ("mac", "hops", "edge", "reason")
+
+    def __init__(self, mac, hops, edge, reason):
+        self.mac = mac
+        self.hops = hops
+        self.edge = edge
+        self.reason = reason
+
+    def __repr__(self):
+        return f"MacLocation({format_mac(self.mac)!r}, edge={self.edge!r}, reason={self.reason!r})"
+
+
+class MacLocator:
+    """
+    Locate MAC addresses across every switch in a record index.
+
+    Parameters:
+        records (RecordIndex): The loaded collections.
+    """
+
+    def __init__(self, records):
+        self.records = records
+        with records.connect() as db:
+            rows = db.execute("SELECT id, host, date FROM latest_collections").fetchall()
+        # Host -> (collection ID, date) of its latest collection.
+        self.collections = {host: (collection_id, date) for collection_id, host, date in rows}
+        # host_key() of each host -> host, to match CDP device IDs and addresses.
+        self.host_names = {host_key(host): host for host in self.collections}
+        self._tables = {}
+
+    def switch(self, host):
+        """
+        Return the SwitchTables of a switch, building them on first use, or None if it was not collected.
+        """
+        tables = self._tables.get(host)
+        if tables is None and host in self.collections:
+            collection_id, date = self.collections[host]
+            tables = self._tables[host] = SwitchTables(host, date)
+            with self.records.connect() as db:
+                for mac, vlan, port, interface, learned in db.execute(
+                        "SELECT mac, vlan, port, interface, learned FROM mac_entries WHERE collection_id = ?",
+                        (collection_id,)):
+                    tables.macs.setdefault(mac, []).append((vlan, port, interface, learned))
+                for interface, device_id, port_id, ip_address, category in db.execute(
+                        "SELECT interface, device_id, port_id, ip_address, category FROM cdp_neighbors "
+                        "WHERE collection_id = ?", (collection_id,)):
+                    tables.neighbors[interface] = (device_id, port_id, ip_address, category)
+                for interface, channel in db.execute(
+                        "SELECT interface, channel FROM channel_members WHERE collection_id = ?", (collection_id,)):
+                    tables.channel_members.setdefault(channel, []).append(interface)
+        return tables
+
+    def preload(self):
+        """
+        Build the tables of every switch up front, e.g. before locating many addresses.
+        """
+        for host in self.collections:
+            self.switch(host)
+
+    def collected_host(self, device_id, ip_address=None):
+        """
+        Return the collected switch a CDP neighbor is, matched on its device ID or IP address, or None.
+        """
+        host = self.host_names.get(host_key(device_id))
+        if host is None and ip_address:
+            host = self.host_names.get(ip_address)
+        return host
+
+    def locate(self, mac, start=None, vlan=None):
+        """
+        Follow a MAC address from switch to switch to its access port.
+
+        Parameters:
+            mac (str or int): The address, in any common notation, or as a 48-bit integer.
+            start (str): Switch to start at, e.g. the core. Defaults to a switch that has
+                the address in its table, one with a local entry if there is one.
+            vlan (int): Only follow entries in this VLAN. Defaults to the VLAN of the
+                entry on the first switch.
+
+        Returns:
+            MacLocation: The switches visited and, if found, the access port.
+        """
+        if isinstance(mac, str):
+            mac = mac_to_int(mac)
+        if start is None:
+            sightings = self.records.find_mac(mac)
+            if not sightings:
+                return MacLocation(mac, [], None, "not in any collected MAC table")
+            # find_mac() lists local entries first.
+            start = sightings[0].host
+
+        hops = []
+        host = start
+        while True:
+            if any(hop.host == host for hop in hops):
+                return MacLocation(mac, hops, None, f"loop back to {host}")
+            tables = self.switch(host)
+            if tables is None:
+                return MacLocation(mac, hops, None, f"{host} has not been collected")
+            entries = tables.macs.get(mac, [])
+            if vlan is not None:
+                entries = [entry for entry in entries if entry[0] == vlan or entry[0] is None]
+            if not entries:
+                return MacLocation(mac, hops, None, f"not in the MAC table of {host}")
+            # Prefer a local entry, in case the address shows on more than one port.
+            entry_vlan, port, interface, learned = min(entries, key=lambda entry: entry[3] != "local")
+            if vlan is None:
+                vlan = entry_vlan
+            hop = LocatorHop(host, entry_vlan, port, learned)
+            hops.append(hop)
+            if learned == "local":
+                return MacLocation(mac, hops, hop, "found")
+            if learned == "skipped":
+                return MacLocation(mac, hops, None, f"the address of {host} itself")
+
+            neighbor = tables.neighbor(interface)
+            if neighbor is None:
+                if learned is None:
+                    # Trunks were not collected; a port with no neighbor is taken as an access port.
+                    return MacLocation(mac, hops, hop, "found")
+                return MacLocation(mac, hops, None, f"no CDP neighbor on {port} of {host}")
+            device_id, _, ip_address, category = neighbor
+            hop.neighbor = device_id
+            next_host = self.collected_host(device_id, ip_address)
+            if next_host is None:
+                if learned is None or category in END_DEVICE_CATEGORIES:
+                    # An AP or phone on a trunk: the device is behind it, on this port.
+                    return MacLocation(mac, hops, hop, "found")
+                if not ip_address:
+                    return MacLocation(mac, hops, None,
+                                       f"learned from {device_id}, which has not been collected under that name "
+                                       f"(collect 'show cdp neighbors detail' on {host} to match it by IP address)")
+                return MacLocation(mac, hops, None, f"learned from {device_id}, which has not been collected")
+            host = next_host
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Find the access port of MAC addresses across the collected switches.")
+    parser.add_argument("database", help="The record index (see record_index.py).")
+    parser.add_argument("macs", nargs="+", help="MAC addresses, in any common notation.")
+    parser.add_argument("--start", help="Switch to start at (default: one that has the address).")
+    parser.add_argument("--vlan", type=int, help="Only follow entries in this VLAN.")
+    args = parser.parse_args(argv)
+
+    locator = MacLocator(RecordIndex(args.database))
+    if len(args.macs) > 1:
+        locator.preload()
+    status = 0
+    for mac in args.macs:
+        location = locator.locate(mac, args.start, args.vlan)
+        path = " -> ".join(f"{hop.host} {hop.port}" for hop in location.hops)
+        if location.edge is not None:
+            print(f"{format_mac(location.mac)}: {location.edge.host} {location.edge.port} "
+                  f"(vlan {location.edge.vlan}) via {path}")
+        else:
+            status = 1
+            print(f"{format_mac(location.mac)}: not found, {location.reason}" + (f" (via {path})" if path else ""))
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,191 @@
+"""
+Open output files that may be compressed.
+
+Running configs and MAC tables are plain text and compress roughly tenfold. With
+compression turned on, the collectors write each output file through a
+compressor as it is streamed, with the usual filename plus ".zst" (zstandard) or
+".gz" (gzip), e.g. "SW01_20261015_sh_running-config.txt.gz". Readers pick the
+decompressor from the suffix, so compressed and plain files can be read alike:
+
+    with open_output("SW01_20261015_show_vlan.txt.gz") as file:
+        file.write(text)
+    with open_input("SW01_20261015_show_vlan.txt.gz") as file:
+        text = file.read()
+
+zstandard needs the optional "zstandard" package; gzip is always available.
+Compressed files are written the same way every time for the same contents (no
+timestamp or filename in the gzip header), so an unchanged output gives a
+byte-identical file.
+"""
+import contextlib
+import gzip
+import io
+import os
+import shutil
+import uuid
+
+try:
+    import zstandard
+except ImportError:  # zstandard is optional, gzip works without it.
+    zstandard = None
+
+# Compression name -> filename suffix added after ".txt".
+COMPRESSION_SUFFIXES = {
+    "zstd": ".zst",
+    "gzip": ".gz",
+}
+
+# Compression levels: fast enough to keep up with a switch, still about tenfold on text.
+ZSTD_LEVEL = 3
+GZIP_LEVEL = 6
+
+# Bytes copied at a time when converting between compressions.
+COPY_CHUNK_SIZE = 1024 * 1024
+
+
+def available_compression(compression="auto"):
+    """
+    Return the compression to use for a requested one: "auto" picks zstd when the
+    zstandard package is installed and gzip otherwise. None means no compression.
+
+    Raises:
+        ValueError: For an unknown compression, or zstd without the zstandard package.
+    """
+    if compression is None:
+        return None
+    if compression == "auto":
+        return "zstd" if zstandard is not None else "gzip"
+    if compression not in COMPRESSION_SUFFIXES:
+        raise ValueError(f"Unknown compression '{compression}'.")
+    if compression == "zstd" and zstandard is None:
+        raise ValueError("zstd compression needs the 'zstandard' package installed.")
+    return compression
+
+
+def compression_of(file_path):
+    """
+    Return the compression of a file from its suffix ("zstd", "gzip"), or None for a plain file.
+    """
+    for compression, suffix in COMPRESSION_SUFFIXES.items():
+        if file_path.endswith(suffix):
+            return compression
+    return None
+
+
+def with_compression(file_path, compression):
+    """
+    Return the filename for a file written with the given compression (None for plain).
+    """
+    return file_path + COMPRESSION_SUFFIXES[compression] if compression else file_path
+
+
+def strip_compression(file_path):
+    """
+    Return the filename without its compression suffix, if it has one.
+    """
+    compression = compression_of(file_path)
+    return file_path[:-len(COMPRESSION_SUFFIXES[compression])] if compression else file_path
+
+
+class _GzipWriter(gzip.GzipFile):
+    # gzip.open() puts the filename and the time in the header; leave both out so the
+    # same contents always give the same bytes.
+
+    def __init__(self, file_path):
+        self._raw = open(file_path, "wb")
+        try:
+            super().__init__(filename="", mode="wb", compresslevel=GZIP_LEVEL, fileobj=self._raw, mtime=0)
+        except BaseException:
+            self._raw.close()
+            raise
+
+    def close(self):
+        try:
+            super().close()
+        finally:
+            self._raw.close()
+
+
+def open_output(file_path, mode="w"):
+    """
+    Open a file for writing, compressing as it is written if its suffix asks for it.
+
+    Parameters:
+        file_path (str): The file, e.g. "..._show_vlan.txt", "..._show_vlan.txt.zst".
+        mode (str): "w" for text (as open() would), "wb" for bytes.
+    """
+    if mode not in ("w", "wb"):
+        raise ValueError(f"Unsupported mode '{mode}'.")
+    compression = compression_of(file_path)
+    if compression is None:
+        return open(file_path, mode)
+    if compression == "zstd":
+        if zstandard is None:
+            raise ValueError("zstd compression needs the 'zstandard' package installed.")
+        binary = zstandard.ZstdCompressor(level=ZSTD_LEVEL).stream_writer(open(file_path, "wb"), closefd=True)
+    else:
+        binary = _GzipWriter(file_path)
+    return binary if mode == "wb" else io.TextIOWrapper(binary)
+
+
+def open_input(file_path, mode="r"):
+    """
+    Open a file for reading, decompressing as it is read if its suffix says it is compressed.
+
+    Parameters:
+        file_path (str): The file.
+        mode (str): "r" for text (as open() would), "rb" for bytes.
+    """
+    if mode not in ("r", "rb"):
+        raise ValueError(f"Unsupported mode '{mode}'.")
+    compression = compression_of(file_path)
+    if compression is None:
+        return open(file_path, mode)
+    if compression == "zstd":
+        if zstandard is None:
+            raise ValueError("Reading a zstd file needs the 'zstandard' package installed.")
+        binary = zstandard.ZstdDecompressor().stream_reader(open(file_path, "rb"), closefd=True)
+    else:
+        binary = gzip.open(file_path, "rb")
+    return binary if mode == "rb" else io.TextIOWrapper(binary)
+
+
+@contextlib.contextmanager
+def atomic_output(file_path, mode="w", compress=True):
+    """
+    Context manager opening a file for writing like open_output(), but through a
+    temporary file next to it. The temporary file replaces file_path only when the
+    block completes, and is removed if it fails, so an interrupted command or report
+    never leaves a half-written file under the real name.
+
+    With compress=False the file is opened as open() would, whatever its suffix, e.g.
+    to copy bytes that are already compressed.
+    """
+    directory, filename = os.path.split(file_path)
+    # The real filename stays at the end, so the compression suffix still applies.
+    temp_path = os.path.join(directory, f".partial-{uuid.uuid4().hex[:12]}-{filename}")
+    try:
+        with (open_output(temp_path, mode) if compress else open(temp_path, mode)) as file:
+            yield file
+        os.replace(temp_path, file_path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(temp_path)
+        raise
+
+
+def copy_output(source_path, target_path):
+    """
+    Copy an output file, converting between compressions if the two suffixes differ.
+
+    The copy is written through atomic_output(), so a failed copy never leaves a
+    truncated file under target_path.
+    """
+    if compression_of(source_path) == compression_of(target_path):
+        # Same format: the bytes are copied as they are.
+        with open(source_path, "rb") as source, atomic_output(target_path, "wb", compress=False) as target:
+            shutil.copyfileobj(source, target, COPY_CHUNK_SIZE)
+    else:
+        with open_input(source_path, "rb") as source, atomic_output(target_path, "wb") as target:
+            shutil.copyfileobj(source, target, COPY_CHUNK_SIZE)
+    return target_path
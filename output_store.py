@@ -0,0 +1,412 @@
+"""
+Content-addressed archive of collection outputs.
+
+Most of a switch's output files are byte-for-byte the same as the day before.
+ContentStore keeps each distinct file content once, as a gzip-compressed blob
+named after the SHA-256 of the uncompressed content, so an unchanged running-config
+costs nothing on the next day:
+
+    store/
+        objects/3f/3fa1...e9.gz       one blob per distinct content
+        manifests/20261015_020000.jsonl one manifest per collection run
+        index.sqlite                  what every run stored, for listings and lookups
+
+Each manifest lists the files of one run (switch, date, output name, original
+filename, hash and size), one JSON line per file after a header line. The SQLite index holds the same entries with indexes on
+switch and date, so "list the outputs of 20261015" or "latest outputs of switch X"
+are a query instead of a scan over thousands of files. The index can be rebuilt
+from the manifests at any time.
+
+    store = ContentStore(os.path.join(output_dir, "store"))
+    run = store.begin_run(date_str)
+    run.add_files(host, files)
+    store.latest(host)
+
+Command line:
+
+    python output_store.py /srv/cisco-output/store list --date 20261015
+    python output_store.py /srv/cisco-output/store latest SW-CLOSET-01
+    python output_store.py /srv/cisco-output/store export SW-CLOSET-01 --to restored/
+"""
+import argparse
+import contextlib
+import datetime
+import gzip
+import hashlib
+import itertools
+import json
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+
+from output_files import atomic_output, open_input, strip_compression
+
+# Bump when the layout of manifests changes. Format 1 manifests (one JSON document,
+# rewritten after each switch) are still read.
+MANIFEST_FORMAT = 2
+
+# Bytes read at a time when hashing or copying a file.
+CHUNK_SIZE = 1024 * 1024
+
+# Compression level of the gzip blobs; text compresses well at the default level already.
+GZIP_LEVEL = 6
+
+INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outputs (
+    run TEXT NOT NULL,
+    host TEXT NOT NULL,
+    date TEXT NOT NULL,
+    name TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    sha256 TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    PRIMARY KEY (run, host, name)
+);
+CREATE INDEX IF NOT EXISTS outputs_by_host ON outputs (host, name, date);
+CREATE INDEX IF NOT EXISTS outputs_by_date ON outputs (date, host);
+"""
+
+
+class StoredOutput:
+    """
+    One output file kept in the store.
+
+    Attributes:
+        run (str): The run that stored it, e.g. "20261015_020000".
+        host (str): Switch hostname.
+        date (str): Date part of the filename (YYYYMMDD).
+        name (str): Output name, the filename part after host and date, e.g. "sh_running-config".
+        filename (str): The original filename, e.g. "SW01_20261015_sh_running-config.txt".
+        sha256 (str): Hex digest of the (uncompressed) contents; the blob's name.
+        size (int): Size of the contents in bytes.
+    """
+    __slots__ = ("run", "host", "date", "name", "filename", "sha256", "size")
+
+    def __init__(self, run, host, date, name, filename, sha256, size):
+        self.run = run
+        self.host = host
+        self.date = date
+        self.name = name
+        self.filename = filename
+        self.sha256 = sha256
+        self.size = size
+
+    def as_dict(self):
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+    def __repr__(self):
+        return f"StoredOutput({self.run!r}, {self.filename!r}, {self.sha256[:12]!r})"
+
+
+def output_name(filename, host, date_str):
+    """
+    Return the output name of a collector filename, e.g.
+    "SW01_20261015_sh_running-config.txt" -> "sh_running-config".
+    """
+    name = os.path.splitext(strip_compression(filename))[0]
+    prefix = f"{host}_{date_str}_"
+    return name[len(prefix):] if name.startswith(prefix) else name
+
+
+def hash_file(file_path):
+    """
+    Return (SHA-256 hex digest, size in bytes) of a file's contents, read in chunks.
+    Compressed output files are hashed and measured uncompressed.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    with open_input(file_path, "rb") as file:
+        for chunk in iter(lambda: file.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+            size += len(chunk)
+    return digest.hexdigest(), size
+
+
+class ContentStore:
+    """
+    A folder of compressed, content-addressed blobs with per-run manifests and an index.
+
+    Parameters:
+        root (str): The store folder, created if missing.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.objects_dir = os.path.join(root, "objects")
+        self.manifests_dir = os.path.join(root, "manifests")
+        self.index_path = os.path.join(root, "index.sqlite")
+        os.makedirs(self.objects_dir, exist_ok=True)
+        os.makedirs(self.manifests_dir, exist_ok=True)
+        with self._index() as db:
+            db.executescript(INDEX_SCHEMA)
+
+    @contextlib.contextmanager
+    def _index(self):
+        # A connection per use, so the store can be shared between threads.
+        db = sqlite3.connect(self.index_path)
+        try:
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    def blob_path(self, sha256):
+        """
+        Return the path of the blob holding the given content.
+        """
+        return os.path.join(self.objects_dir, sha256[:2], sha256 + ".gz")
+
+    def __contains__(self, sha256):
+        return os.path.exists(self.blob_path(sha256))
+
+    def put(self, file_path):
+        """
+        Add a file's contents to the store, unless the same contents are already there.
+
+        The file is hashed first and only compressed when its contents are new, so the
+        daily unchanged files cost a read and no write.
+
+        Returns:
+            tuple: (SHA-256 hex digest, size in bytes).
+        """
+        sha256, size = hash_file(file_path)
+        blob_path = self.blob_path(sha256)
+        if not os.path.exists(blob_path):
+            os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+            # Compress to a temporary file first, so a blob is never seen half written.
+            fd, temp_path = tempfile.mkstemp(prefix=".blob_", dir=os.path.dirname(blob_path))
+            try:
+                with open_input(file_path, "rb") as source, os.fdopen(fd, "wb") as raw, \
+                        gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=GZIP_LEVEL, mtime=0) as target:
+                    shutil.copyfileobj(source, target, CHUNK_SIZE)
+                os.replace(temp_path, blob_path)
+            except BaseException:
+                with contextlib.suppress(OSError):
+                    os.unlink(temp_path)
+                raise
+        return sha256, size
+
+    def open(self, sha256):
+        """
+        Open a blob for reading as text, decompressing as it is read.
+        """
+        return gzip.open(self.blob_path(sha256), "rt", newline="")
+
+    def copy_to(self, sha256, file_path):
+        """
+        Write the contents of a blob to file_path and return file_path. The file is
+        compressed if its suffix asks for it (see output_files), plain otherwise, and
+        only appears under its name once fully written (see output_files.atomic_output).
+        """
+        with gzip.open(self.blob_path(sha256), "rb") as source, atomic_output(file_path, "wb") as target:
+            shutil.copyfileobj(source, target, CHUNK_SIZE)
+        return file_path
+
+    def begin_run(self, date_str=None, run_id=None):
+        """
+        Start recording a collection run; see StoreRun.
+        """
+        return StoreRun(self, date_str, run_id)
+
+    def _add_to_index(self, outputs):
+        with self._index() as db:
+            db.executemany(
+                "INSERT OR REPLACE INTO outputs (run, host, date, name, filename, sha256, size) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [tuple(output.as_dict().values()) for output in outputs])
+
+    def _query(self, sql, parameters=()):
+        with self._index() as db:
+            rows = db.execute(sql, parameters).fetchall()
+        return [StoredOutput(*row[:7]) for row in rows]
+
+    def listing(self, host=None, date=None):
+        """
+        Return the stored outputs, optionally only for one switch and/or one date.
+
+        Returns:
+            list: StoredOutput records, by date, switch and name.
+        """
+        conditions, parameters = [], []
+        if host is not None:
+            conditions.append("host = ?")
+            parameters.append(host)
+        if date is not None:
+            conditions.append("date = ?")
+            parameters.append(date)
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        return self._query("SELECT run, host, date, name, filename, sha256, size FROM outputs"
+                           f"{where} ORDER BY date, host, name, run", parameters)
+
+    def latest(self, host, name=None):
+        """
+        Return the most recent stored output of each name for a switch.
+
+        Parameters:
+            host (str): Switch hostname.
+            name (str): Optional, only this output, e.g. "sh_running-config".
+
+        Returns:
+            list: StoredOutput records, one per output name, by name.
+        """
+        # SQLite takes the bare columns from the row holding the MAX() of each group.
+        sql = ("SELECT run, host, date, name, filename, sha256, size, MAX(date || run) FROM outputs "
+               "WHERE host = ?")
+        parameters = [host]
+        if name is not None:
+            sql += " AND name = ?"
+            parameters.append(name)
+        return self._query(sql + " GROUP BY name ORDER BY name", parameters)
+
+    def hosts(self):
+        """
+        Return every switch with outputs in the store, sorted.
+        """
+        with self._index() as db:
+            return [row[0] for row in db.execute("SELECT DISTINCT host FROM outputs ORDER BY host")]
+
+    def iter_manifests(self):
+        """
+        Yield the contents of every manifest, oldest run first, as a dictionary with
+        "format", "run", "date" and "outputs" (a list of StoredOutput dictionaries).
+        """
+        for filename in sorted(os.listdir(self.manifests_dir)):
+            if filename.endswith(".json"):
+                with open(os.path.join(self.manifests_dir, filename)) as file:
+                    yield json.load(file)
+            elif filename.endswith(".jsonl"):
+                with open(os.path.join(self.manifests_dir, filename)) as file:
+                    manifest = dict(json.loads(file.readline()), outputs=[])
+                    for line in file:
+                        try:
+                            manifest["outputs"].append(json.loads(line))
+                        except ValueError:
+                            # The last line of a run that was killed while appending.
+                            continue
+                yield manifest
+
+    def rebuild_index(self):
+        """
+        Recreate the index from the manifests.
+
+        Returns:
+            int: Number of outputs indexed.
+        """
+        with self._index() as db:
+            db.execute("DELETE FROM outputs")
+        count = 0
+        for manifest in self.iter_manifests():
+            if manifest.get("format") != MANIFEST_FORMAT:
+                continue
+            outputs = [StoredOutput(**entry) for entry in manifest["outputs"]]
+            self._add_to_index(outputs)
+            count += len(outputs)
+        return count
+
+
+class StoreRun:
+    """
+    The outputs stored by one collection run, written to its manifest as they are added.
+
+    Each switch's entries are appended to the manifest, so an interrupted run still
+    lists the switches it finished and a large run costs one write per switch.
+
+    Parameters:
+        store (ContentStore): The store.
+        date_str (str): Date of the run's files (YYYYMMDD), defaults to today.
+        run_id (str): Name of the run, defaults to the current time, e.g. "20261015_020000".
+            If a run of that name exists already, "_2", "_3", ... is added.
+    """
+
+    def __init__(self, store, date_str=None, run_id=None):
+        now = datetime.datetime.now()
+        self.store = store
+        self.date_str = date_str or now.strftime('%Y%m%d')
+        self.run_id, self.manifest_path = self._create_manifest(run_id or now.strftime('%Y%m%d_%H%M%S'))
+        self.outputs = []
+
+    def add_files(self, host, files, remove=False):
+        """
+        Store a switch's output files and add them to the manifest and the index.
+
+        Parameters:
+            host (str): Switch hostname.
+            files (list): Paths of the switch's output files.
+            remove (bool): Delete each file once it is stored.
+
+        Returns:
+            list: The StoredOutput records added.
+        """
+        files = list(dict.fromkeys(files))
+        added = []
+        for file_path in files:
+            sha256, size = self.store.put(file_path)
+            filename = os.path.basename(file_path)
+            added.append(StoredOutput(self.run_id, host, self.date_str,
+                                      output_name(filename, host, self.date_str), filename, sha256, size))
+        self.outputs.extend(added)
+        self._append_to_manifest(added)
+        self.store._add_to_index(added)
+        if remove:
+            for file_path in files:
+                os.remove(file_path)
+        return added
+
+    def _create_manifest(self, run_id):
+        # Mode "x" fails if the manifest exists, so two runs started in the same second
+        # never share one.
+        for attempt in itertools.count(1):
+            unique_id = run_id if attempt == 1 else f"{run_id}_{attempt}"
+            manifest_path = os.path.join(self.store.manifests_dir, unique_id + ".jsonl")
+            if os.path.exists(os.path.join(self.store.manifests_dir, unique_id + ".json")):
+                continue
+            try:
+                with open(manifest_path, "x") as file:
+                    file.write(json.dumps({"format": MANIFEST_FORMAT, "run": unique_id, "date": self.date_str}) + "\n")
+            except FileExistsError:
+                continue
+            return unique_id, manifest_path
+
+    def _append_to_manifest(self, outputs):
+        # One write per switch; a line cut short by a crash is skipped when read back.
+        with open(self.manifest_path, "a") as file:
+            file.write("".join(json.dumps(output.as_dict()) + "\n" for output in outputs))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="List and restore outputs kept in a content store.")
+    parser.add_argument("store", help="The store folder.")
+    commands = parser.add_subparsers(dest="action", required=True)
+    list_parser = commands.add_parser("list", help="List stored outputs.")
+    list_parser.add_argument("--host")
+    list_parser.add_argument("--date", help="YYYYMMDD")
+    latest_parser = commands.add_parser("latest", help="Show the latest outputs of a switch.")
+    latest_parser.add_argument("host")
+    export_parser = commands.add_parser("export", help="Write the latest outputs of a switch to a folder.")
+    export_parser.add_argument("host")
+    export_parser.add_argument("--to", default=".", help="Folder the files are written to.")
+    commands.add_parser("reindex", help="Rebuild the index from the manifests.")
+    args = parser.parse_args(argv)
+
+    store = ContentStore(args.store)
+    if args.action == "reindex":
+        print(f"{store.rebuild_index()} outputs indexed.")
+        return 0
+    if args.action == "list":
+        outputs = store.listing(args.host, args.date)
+    else:
+        outputs = store.latest(args.host)
+    if args.action == "export":
+        os.makedirs(args.to, exist_ok=True)
+        for output in outputs:
+            print(store.copy_to(output.sha256, os.path.join(args.to, output.filename)))
+    else:
+        for output in outputs:
+            print(f"{output.date}  {output.size:>10}  {output.sha256[:12]}  {output.filename}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,30 +1,181 @@
-def merge_wrapped_lines(raw_output):
+import contextlib
+import re
+import tempfile
+
+from classification_rules import CDP_CATEGORIES, current_rules
+# merge_wrapped_lines and iter_merge_wrapped_lines used to live here and are still importable from this module.
+from text_parsing import (column_offsets, iter_lines, iter_merge_wrapped_lines, iter_wrapped_entries,
+                          merge_wrapped_lines, slice_columns)
+
+# Column headings of 'show cdp neighbors', in order.
+CDP_COLUMNS = ("Device ID", "Local Intrfce", "Holdtme", "Capability", "Platform", "Port ID")
+# Start offset of each column when the output has no heading line to take them from.
+DEFAULT_CDP_OFFSETS = (0, 17, 35, 46, 58, 68)
+
+# Each report section is held in memory up to this size, then spills to a temporary file.
+CATEGORY_SPOOL_MAX_SIZE = 256 * 1024
+
+# Lines of 'show cdp neighbors detail' that carry a neighbor field.
+DETAIL_DEVICE_PATTERN = re.compile(r"Device ID:\s*(\S+)")
+DETAIL_PLATFORM_PATTERN = re.compile(r"Platform:\s*(.*?),\s*Capabilities:\s*(.*)")
+DETAIL_INTERFACE_PATTERN = re.compile(r"Interface:\s*(.*?),\s*Port ID \(outgoing port\):\s*(.*)")
+DETAIL_HOLDTIME_PATTERN = re.compile(r"Holdtime\s*:\s*(\d+)")
+DETAIL_ADDRESS_PATTERN = re.compile(r"IP(?:v4)? [Aa]ddress:\s*(\S+)")
+
+class CdpNeighbor:
     """
-    Merge wrapped lines from the raw output.
+    One CDP neighbor.
     
-    If a line starts with whitespace, it is assumed to be a continuation of the previous line.
-    Returns a list of merged lines.
+    Attributes:
+        device_id (str): Neighbor hostname (Device ID).
+        local_interface (str): Interface on this switch, as shown, e.g. "Gig 1/0/1".
+        holdtime (int): Holdtime in seconds, or None if not shown.
+        capability (str): Capability codes, e.g. "S I" or "Switch IGMP".
+        platform (str): Neighbor platform, e.g. "C9120AXI" or "WS-C3850-".
+        port_id (str): Interface on the neighbor, e.g. "Gig 1/0/48".
+        ip_address (str): Management address from the detail output, or None.
+        text (str): The entry as shown in the raw output, wrapped lines merged, or None.
     """
-    merged_lines = []
-    current_line = ""
-    for line in raw_output.splitlines():
-        # If line is empty, skip it.
-        if not line.strip():
+    __slots__ = ("device_id", "local_interface", "holdtime", "capability", "platform", "port_id",
+                 "ip_address", "text")
+    
+    def __init__(self, device_id, local_interface="", holdtime=None, capability="", platform="", port_id="",
+                 ip_address=None, text=None):
+        self.device_id = device_id
+        self.local_interface = local_interface
+        self.holdtime = holdtime
+        self.capability = capability
+        self.platform = platform
+        self.port_id = port_id
+        self.ip_address = ip_address
+        self.text = text
+    
+    def __repr__(self):
+        return (f"CdpNeighbor({self.device_id!r}, {self.local_interface!r}, {self.holdtime!r}, "
+                f"{self.capability!r}, {self.platform!r}, {self.port_id!r})")
+    
+    def render(self):
+        """
+        Return the neighbor as one report line: the original line if there is one, else its fields.
+        """
+        if self.text is not None:
+            return self.text
+        fields = (self.device_id, self.local_interface, self.holdtime, self.capability, self.platform, self.port_id)
+        return " ".join(str(value) for value in fields if value not in (None, ""))
+
+def iter_parse_cdp_neighbors(lines, special_lines=None):
+    """
+    Parse the output of 'show cdp neighbors' into CdpNeighbor records, in one pass.
+    
+    Columns are cut at the offsets of the heading line. An entry whose Device ID is too
+    long for its column is shown by IOS on two lines; the second line is read with the
+    same offsets. Other lines ("Capability Codes:" legend, headings, "Total cdp entries
+    displayed") are not neighbors; they are appended to special_lines if given.
+    
+    Parameters:
+        lines (iterable): Lines of the raw output.
+        special_lines (list): Optional list receiving the non-neighbor lines, wrapped lines merged.
+    
+    Yields:
+        CdpNeighbor: Each neighbor, in the order shown.
+    """
+    offsets = DEFAULT_CDP_OFFSETS
+    
+    def finish(raw_lines):
+        nonlocal offsets
+        text = " ".join(raw_line.strip() for raw_line in raw_lines)
+        if text.startswith("Device ID"):
+            offsets = column_offsets(raw_lines[0], CDP_COLUMNS) or offsets
+        if text.startswith(("Device ID", "Capability Codes:", "Total cdp entries displayed")):
+            if special_lines is not None:
+                special_lines.append(text)
+            return None
+        fields = slice_columns(raw_lines[0].rstrip(), offsets)
+        if len(raw_lines) > 1 and len(raw_lines[0].split()) == 1:
+            # Device ID on its own line, the other columns on the next one.
+            fields = [raw_lines[0].strip()] + slice_columns(raw_lines[1].rstrip(), offsets)[1:]
+        device_id, local_interface, holdtime, capability, platform, port_id = fields
+        return CdpNeighbor(device_id, local_interface, int(holdtime) if holdtime.isdigit() else None,
+                           capability, platform, port_id, text=text)
+    
+    for entry_lines in iter_wrapped_entries(lines):
+        neighbor = finish(entry_lines)
+        if neighbor is not None:
+            yield neighbor
+
+def iter_parse_cdp_neighbors_detail(lines, special_lines=None):
+    """
+    Parse the output of 'show cdp neighbors detail' into CdpNeighbor records, in one pass.
+    
+    Each "Device ID:" line starts a new neighbor; the platform, interface, holdtime and
+    first IP address lines that follow fill in its fields. The "Total cdp entries
+    displayed" line is appended to special_lines if given.
+    
+    Parameters:
+        lines (iterable): Lines of the raw output.
+        special_lines (list): Optional list receiving the non-neighbor summary line.
+    
+    Yields:
+        CdpNeighbor: Each neighbor, in the order shown.
+    """
+    neighbor = None
+    for line in lines:
+        line = line.strip()
+        match = DETAIL_DEVICE_PATTERN.match(line)
+        if match:
+            if neighbor is not None:
+                yield neighbor
+            neighbor = CdpNeighbor(match.group(1))
             continue
-        # If the line starts with whitespace, it is a continuation.
-        if line[0].isspace():
-            current_line += " " + line.strip()
-        else:
-            # If there's an existing line, append it.
-            if current_line:
-                merged_lines.append(current_line)
-            current_line = line.strip()
-    # Append the last line if exists.
-    if current_line:
-        merged_lines.append(current_line)
-    return merged_lines
+        if line.startswith("Total cdp entries displayed"):
+            if special_lines is not None:
+                special_lines.append(line)
+            continue
+        if neighbor is None:
+            continue
+        match = DETAIL_PLATFORM_PATTERN.match(line)
+        if match:
+            neighbor.platform, neighbor.capability = match.group(1).strip(), match.group(2).strip()
+            continue
+        match = DETAIL_INTERFACE_PATTERN.match(line)
+        if match:
+            neighbor.local_interface, neighbor.port_id = match.group(1).strip(), match.group(2).strip()
+            continue
+        match = DETAIL_HOLDTIME_PATTERN.match(line)
+        if match:
+            neighbor.holdtime = int(match.group(1))
+            continue
+        match = DETAIL_ADDRESS_PATTERN.match(line)
+        if match and neighbor.ip_address is None:
+            neighbor.ip_address = match.group(1)
+    if neighbor is not None:
+        yield neighbor
+
+def parse_cdp_neighbors(raw_output):
+    """
+    Parse the raw output of 'show cdp neighbors', or of 'show cdp neighbors detail',
+    into a list of CdpNeighbor records.
+    """
+    lines = list(iter_lines(raw_output))
+    if any(DETAIL_DEVICE_PATTERN.match(line.strip()) for line in lines):
+        return list(iter_parse_cdp_neighbors_detail(lines))
+    return list(iter_parse_cdp_neighbors(lines))
 
 def process_cdp_neighbors(raw_output):
+    """
+    Process the raw output of the 'show cdp neighbors' command.
+    
+    See iter_process_cdp_neighbors for the processing applied.
+    
+    Parameters:
+        raw_output (str): The raw output from the 'show cdp neighbors' command.
+    
+    Returns:
+        str: The fully processed output.
+    """
+    return "\n".join(iter_process_cdp_neighbors(iter_lines(raw_output)))
+
+def iter_process_cdp_neighbors(lines):
     """
     Process the raw output of the 'show cdp neighbors' command by:
     
@@ -32,144 +183,138 @@ def process_cdp_neighbors(raw_output):
        (with two blank lines following it).
     2. Moving any lines that start with "Capability Codes:" or "Device ID" to the very bottom
        (with three blank lines preceding them).
-    3. Grouping the remaining lines into these sections:
-         - "sav switches": Lines that contain any of the strings "sav01", "sav02", "sav03", or "CBS350".
-         - "uplink to distribution layer": Lines that contain any of the strings "LBDS", "BDS", "SBDS", "HDS", or "CPDS".
-         - "WAPs": Lines that contain any of the specified WAP model identifiers.
-         - "Phone Handsets": Lines that contain the string "T33".
-         - "Unsorted": Lines that do not match any of the above criteria.
+    3. Grouping the neighbors into these sections, matching on the parsed fields:
+         - "sav switches": Device ID containing "sav01", "sav02" or "sav03", or platform "CBS350".
+         - "WAPs": Platform is one of the specified WAP models.
+         - "Phone Handsets": Platform containing "T33".
+         - "uplink to distribution layer": Device ID containing "LBDS", "BDS", "SBDS", "HDS" or "CPDS".
+         - "Unsorted": Neighbors that do not match any of the above criteria.
+       The keywords for each section come from the rules file (see classification_rules);
+       the ones listed are the built-in defaults. Each neighbor is shown as its original
+       line, with wrapped lines merged.
     4. Appending a count for WAPs and Phone Handsets sections.
     
     Parameters:
-        raw_output (str): The raw output from the 'show cdp neighbors' command.
+        lines (iterable): Lines of the raw output from the 'show cdp neighbors' command.
     
-    Returns:
-        str: The fully processed output.
+    Yields:
+        str: Each line of the processed output.
     """
-    # Helper: merge wrapped lines.
-    def merge_wrapped_lines(raw):
-        merged_lines = []
-        current_line = ""
-        for line in raw.splitlines():
-            if not line.strip():
-                continue
-            if line[0].isspace():
-                current_line += " " + line.strip()
-            else:
-                if current_line:
-                    merged_lines.append(current_line)
-                current_line = line.strip()
-        if current_line:
-            merged_lines.append(current_line)
-        return merged_lines
+    special_lines = []
+    yield from iter_cdp_report(iter_parse_cdp_neighbors(lines, special_lines), special_lines)
+
+def iter_process_cdp_neighbors_detail(lines):
+    """
+    Build the same report as iter_process_cdp_neighbors from 'show cdp neighbors detail'.
+    
+    Parameters:
+        lines (iterable): Lines of the raw output from the 'show cdp neighbors detail' command.
+    
+    Yields:
+        str: Each line of the processed output.
+    """
+    special_lines = []
+    yield from iter_cdp_report(iter_parse_cdp_neighbors_detail(lines, special_lines), special_lines)
 
-    # First, merge any wrapped lines.
-    merged_lines = merge_wrapped_lines(raw_output)
+def iter_cdp_report(neighbors, special_lines):
+    """
+    Yield the CDP report lines for parsed neighbors.
     
-    # Initialize containers for special lines.
-    top_line = None
-    bottom_lines = []
-    main_lines = []
+    The sections come in a fixed order that is not the output order, so each
+    neighbor's line is written to a spooled temporary file for its category as it is
+    parsed, and the files are read back section by section. Memory stays flat however
+    many neighbors there are; only the special lines are kept in a list.
     
-    # Separate special lines from the main output.
-    for line in merged_lines:
-        # Check for top line.
-        if line.startswith("Total cdp entries displayed"):
-            top_line = line
-        # Check for bottom lines.
-        elif line.startswith("Capability Codes:") or line.startswith("Device ID"):
-            bottom_lines.append(line)
+    Parameters:
+        neighbors (iterable): CdpNeighbor records.
+        special_lines (list): Non-neighbor lines of the output; only read once neighbors is exhausted.
+    
+    Yields:
+        str: Each line of the processed output.
+    """
+    with contextlib.ExitStack() as stack:
+        # Sort the neighbors into categories as they are parsed.
+        rules = current_rules()
+        categories = {
+            category: stack.enter_context(
+                tempfile.SpooledTemporaryFile(max_size=CATEGORY_SPOOL_MAX_SIZE, mode="w+", newline="\n"))
+            for category in CDP_CATEGORIES + ("unsorted",)
+        }
+        counts = dict.fromkeys(categories, 0)
+        for neighbor in neighbors:
+            category = rules.classify_cdp(neighbor)
+            categories[category].write(neighbor.render() + "\n")
+            counts[category] += 1
+        
+        def section(category):
+            spool = categories[category]
+            spool.seek(0)
+            for line in spool:
+                yield line[:-1]
+        
+        # Separate the top line from the lines moved to the bottom.
+        top_line = None
+        bottom_lines = []
+        for line in special_lines:
+            if line.startswith("Total cdp entries displayed"):
+                top_line = line
+            else:
+                bottom_lines.append(line)
+        
+        # Yield the output sections, starting with the top line if present.
+        if top_line:
+            yield top_line
+        else:
+            yield "Total cdp entries displayed: N/A"
+        
+        # Two blank lines after top line.
+        yield ""
+        yield ""
+        
+        # WAPs section with count.
+        yield "WAPs:"
+        if counts["wap"]:
+            yield from section("wap")
+        else:
+            yield "No WAP entries found."
+        yield f"Total number of WAPs: {counts['wap']}"
+        
+        # Phone Handsets section with count.
+        yield "\nPhone Handsets:"
+        if counts["phone"]:
+            yield from section("phone")
+        else:
+            yield "No phone handset entries found."
+        yield f"Total number of Phone Handsets: {counts['phone']}"
+        
+        # sav switches section (no count).
+        yield "\nsav switches:"
+        if counts["sav"]:
+            yield from section("sav")
+        else:
+            yield "No sav switch entries found."
+        
+        # Uplink to distribution layer section (no count).
+        yield "\nuplink to distribution layer:"
+        if counts["uplink"]:
+            yield from section("uplink")
+        else:
+            yield "No uplink entries found."
+        
+        # Unsorted section.
+        yield "\nUnsorted:"
+        if counts["unsorted"]:
+            yield from section("unsorted")
         else:
-            main_lines.append(line)
-    
-    # Define keywords for each category.
-    sav_keywords = ["sav01", "sav02", "sav03", "CBS350","SAV01","SAV02","SAV03"]
-    uplink_keywords = ["LBDS", "BDS", "SBDS", "HDS", "CPDS"]
-    wap_models = ["C9120AXI", "C9130A", "C9120A","CW9166I","AIR-AP"]
-    phone_keyword = "T33"
-    
-    # Process the main lines into categories.
-    sav_switches = []
-    uplinks = []
-    waps = []
-    phone_handsets = []
-    unsorted = []
-    
-    for line in main_lines:
-        # Check for sav switches first.
-        if any(keyword in line for keyword in sav_keywords):
-            sav_switches.append(line)
-        # Next, check for uplink to distribution layer.
-        elif any(keyword in line for keyword in uplink_keywords):
-            uplinks.append(line)
-        # Then check for WAP models.
-        elif any(model in line for model in wap_models):
-            waps.append(line)
-        # Then check for phone handsets.
-        elif phone_keyword in line:
-            phone_handsets.append(line)
+            yield "No unsorted entries found."
+        
+        # Three blank lines before bottom special lines.
+        yield ""
+        yield ""
+        yield ""
+        
+        # Append bottom special lines.
+        if bottom_lines:
+            yield from bottom_lines
         else:
-            unsorted.append(line)
-    
-    # Build the output sections.
-    output_sections = []
-    
-    # Add top line if present.
-    if top_line:
-        output_sections.append(top_line)
-    else:
-        output_sections.append("Total cdp entries displayed: N/A")
-    
-    # Two blank lines after top line.
-    output_sections.append("")
-    output_sections.append("")
-    
-    # WAPs section with count.
-    output_sections.append("WAPs:")
-    if waps:
-        output_sections.extend(waps)
-    else:
-        output_sections.append("No WAP entries found.")
-    output_sections.append(f"Total number of WAPs: {len(waps)}")
-    
-    # Phone Handsets section with count.
-    output_sections.append("\nPhone Handsets:")
-    if phone_handsets:
-        output_sections.extend(phone_handsets)
-    else:
-        output_sections.append("No phone handset entries found.")
-    output_sections.append(f"Total number of Phone Handsets: {len(phone_handsets)}")
-    
-    # sav switches section (no count).
-    output_sections.append("\nsav switches:")
-    if sav_switches:
-        output_sections.extend(sav_switches)
-    else:
-        output_sections.append("No sav switch entries found.")
-    
-    # Uplink to distribution layer section (no count).
-    output_sections.append("\nuplink to distribution layer:")
-    if uplinks:
-        output_sections.extend(uplinks)
-    else:
-        output_sections.append("No uplink entries found.")
-    
-    # Unsorted section.
-    output_sections.append("\nUnsorted:")
-    if unsorted:
-        output_sections.extend(unsorted)
-    else:
-        output_sections.append("No unsorted entries found.")
-    
-    # Three blank lines before bottom special lines.
-    output_sections.append("")
-    output_sections.append("")
-    output_sections.append("")
-    
-    # Append bottom special lines.
-    if bottom_lines:
-        output_sections.extend(bottom_lines)
-    else:
-        output_sections.append("No bottom special lines found.")
-    
-    return "\n".join(output_sections)
+            yield "No bottom special lines found."
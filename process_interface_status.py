@@ -0,0 +1,213 @@
+from text_parsing import column_offsets, iter_lines, slice_columns, split_header
+
+# Column headings of 'show interfaces status', in order.
+INT_STATUS_COLUMNS = ("Port", "Name", "Status", "Vlan", "Duplex", "Speed", "Type")
+
+class InterfaceStatus:
+    """
+    One row of 'show interfaces status'.
+
+    Attributes:
+        port (str): Interface, as shown, e.g. "Gi1/0/1".
+        name (str): Interface description (truncated by IOS to the column width).
+        status (str): e.g. "connected", "notconnect", "err-disabled", "disabled".
+        vlan (str): Access VLAN, or "trunk" / "routed".
+        duplex (str): Duplex as shown, e.g. "a-full", "half", "auto".
+        speed (str): Speed as shown, e.g. "a-100", "1000", "a-10G", "auto".
+        type (str): Media type, e.g. "10/100/1000BaseTX" or "Not Present"; "" if blank (Port-channels).
+        text (str): The row as shown in the raw output.
+
+    A "a-" prefix on duplex or speed means the value was auto-negotiated.
+    """
+    __slots__ = ("port", "name", "status", "vlan", "duplex", "speed", "type", "text")
+
+    def __init__(self, port, name, status, vlan, duplex, speed, type, text=None):
+        self.port = port
+        self.name = name
+        self.status = status
+        self.vlan = vlan
+        self.duplex = duplex
+        self.speed = speed
+        self.type = type
+        self.text = text
+
+    @property
+    def speed_mbps(self):
+        """
+        The speed in Mb/s (e.g. 10 for "a-10", 10000 for "10G"), or None if not known ("auto").
+        """
+        return parse_speed(self.speed)
+
+    @property
+    def duplex_mode(self):
+        """
+        "full", "half" or "auto", without the auto-negotiated "a-" prefix.
+        """
+        return self.duplex[2:] if self.duplex.startswith("a-") else self.duplex
+
+    @property
+    def vlan_id(self):
+        """
+        The access VLAN as an int, or None for trunk and routed ports.
+        """
+        return int(self.vlan) if self.vlan.isdigit() else None
+
+    def __repr__(self):
+        return (f"InterfaceStatus({self.port!r}, {self.name!r}, {self.status!r}, {self.vlan!r}, "
+                f"{self.duplex!r}, {self.speed!r}, {self.type!r})")
+
+def parse_speed(speed):
+    """
+    Convert a 'show interfaces status' speed ("a-100", "1000", "a-10G", "2.5G", "auto") to Mb/s.
+
+    Returns:
+        int: The speed in Mb/s, or None if the speed is not a number (e.g. "auto").
+    """
+    if speed.startswith("a-"):
+        speed = speed[2:]
+    multiplier = 1
+    if speed[-1:] in ("G", "g"):
+        speed, multiplier = speed[:-1], 1000
+    try:
+        return int(float(speed) * multiplier)
+    except ValueError:
+        return None
+
+def iter_parse_interface_status(lines):
+    """
+    Parse 'show interfaces status' output into InterfaceStatus records, in one pass.
+
+    The column offsets are taken from the heading line once. Port and Name are cut at
+    those offsets, since a description may contain spaces or be empty; Status, Vlan,
+    Duplex and Speed never contain spaces and Duplex/Speed are right-aligned under
+    their headings, so the rest of the row is split on whitespace, with whatever is
+    left over being the Type (which can be "Not Present"). Name and Type may be blank
+    (IOS leaves Type empty on Port-channel rows); they are then "".
+
+    Lines before the heading, blank lines and rows that are too short are skipped.
+
+    Parameters:
+        lines (iterable): Lines of the raw output.
+
+    Yields:
+        InterfaceStatus: Each row, in the order shown.
+    """
+    heading, lines = split_header(lines, is_int_status_heading)
+    if heading is None:
+        return
+    # Port, Name and the start of Status; the rest is split on whitespace.
+    offsets = column_offsets(heading, INT_STATUS_COLUMNS)[:3]
+    for line in lines:
+        if not line.strip():
+            continue
+        port, name, rest = slice_columns(line.rstrip(), offsets)
+        fields = rest.split(None, 4)
+        if not port or len(fields) < 4:
+            continue
+        status, vlan, duplex, speed = fields[:4]
+        media_type = fields[4] if len(fields) > 4 else ""
+        yield InterfaceStatus(port, name, status, vlan, duplex, speed, media_type, text=line)
+
+def is_int_status_heading(line):
+    """
+    Return True for the heading line of 'show interfaces status'.
+    """
+    return line.lstrip().startswith("Port") and column_offsets(line, INT_STATUS_COLUMNS) is not None
+
+def parse_interface_status(raw_output):
+    """
+    Parse the raw output of 'show interfaces status' into a list of InterfaceStatus records.
+    """
+    return list(iter_parse_interface_status(iter_lines(raw_output)))
+
+def interface_filter(status=None, vlan=None, duplex=None, speed_below=None, speed_at_least=None):
+    """
+    Build a test for InterfaceStatus records; every criterion given must match.
+
+    Parameters:
+        status (str or iterable): Status value(s), e.g. "err-disabled".
+        vlan (str, int or iterable): VLAN(s), e.g. 10, "trunk".
+        duplex (str or iterable): Duplex mode(s) without the "a-" prefix, e.g. "half".
+        speed_below (int): Only ports with a known speed below this many Mb/s.
+        speed_at_least (int): Only ports with a known speed of at least this many Mb/s.
+
+    Returns:
+        callable: Takes an InterfaceStatus and returns True if it matches.
+    """
+    def as_set(value):
+        if value is None:
+            return None
+        if isinstance(value, (str, int)):
+            value = [value]
+        return {str(item) for item in value}
+
+    statuses, vlans, duplexes = as_set(status), as_set(vlan), as_set(duplex)
+
+    def matches(interface):
+        if statuses is not None and interface.status not in statuses:
+            return False
+        if vlans is not None and interface.vlan not in vlans:
+            return False
+        if duplexes is not None and interface.duplex_mode not in duplexes:
+            return False
+        if speed_below is not None or speed_at_least is not None:
+            speed = interface.speed_mbps
+            if speed is None:
+                return False
+            if speed_below is not None and speed >= speed_below:
+                return False
+            if speed_at_least is not None and speed < speed_at_least:
+                return False
+        return True
+    return matches
+
+def group_interfaces(interfaces, filters):
+    """
+    Run several queries over the interfaces in a single pass.
+
+    Parameters:
+        interfaces (iterable): InterfaceStatus records.
+        filters (dict): Query name -> test, e.g. {"errdisabled": interface_filter(status="err-disabled")}.
+
+    Returns:
+        dict: Query name -> list of matching records, in output order. A record can be in several lists.
+    """
+    groups = {name: [] for name in filters}
+    tests = list(filters.items())
+    for interface in interfaces:
+        for name, test in tests:
+            if test(interface):
+                groups[name].append(interface)
+    return groups
+
+def iter_process_interface_status(lines):
+    """
+    Report the interfaces that usually need attention, from one pass over
+    'show interfaces status':
+
+    - "err-disabled ports"
+    - "connected below 1G": connected ports running at 10 or 100 Mb/s.
+    - "half duplex": connected ports at half duplex.
+
+    Each section lists the original rows, or a "None found." line.
+
+    Parameters:
+        lines (iterable): Lines of the raw output from 'show interfaces status'.
+
+    Yields:
+        str: Each line of the processed output.
+    """
+    sections = [
+        ("err-disabled ports:", interface_filter(status="err-disabled")),
+        ("connected below 1G:", interface_filter(status="connected", speed_below=1000)),
+        ("half duplex:", interface_filter(status="connected", duplex="half")),
+    ]
+    groups = group_interfaces(iter_parse_interface_status(lines), dict(sections))
+    for index, (heading, _) in enumerate(sections):
+        yield heading if index == 0 else "\n" + heading
+        rows = groups[heading]
+        if rows:
+            for interface in rows:
+                yield interface.text
+        else:
+            yield "None found."
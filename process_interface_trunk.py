@@ -0,0 +1,119 @@
+from text_parsing import iter_lines, iter_sections, iter_wrapped_entries
+from vlan_ranges import VlanRangeSet
+
+# 'show interfaces trunk' sections, told apart by the heading after "Port".
+TRUNK_SECTIONS = (
+    ("Mode", "mode"),
+    ("Vlans allowed on trunk", "allowed"),
+    ("Vlans allowed and active", "active"),
+    ("Vlans in spanning tree forwarding", "forwarding"),
+)
+
+class TrunkPort:
+    """
+    One trunk port from 'show interfaces trunk'.
+
+    Attributes:
+        port (str): Interface, as shown, e.g. "Gi1/0/1" or "Po1".
+        mode (str): e.g. "on", "desirable", "auto".
+        encapsulation (str): e.g. "802.1q", "n-802.1q".
+        status (str): e.g. "trunking".
+        native_vlan (int): Native VLAN, or None if not shown.
+        allowed (VlanRangeSet): VLANs allowed on the trunk.
+        active (VlanRangeSet): VLANs allowed and active in the management domain.
+        forwarding (VlanRangeSet): VLANs in spanning tree forwarding state and not pruned.
+    """
+    __slots__ = ("port", "mode", "encapsulation", "status", "native_vlan", "allowed", "active", "forwarding")
+
+    def __init__(self, port, mode="", encapsulation="", status="", native_vlan=None,
+                 allowed=None, active=None, forwarding=None):
+        self.port = port
+        self.mode = mode
+        self.encapsulation = encapsulation
+        self.status = status
+        self.native_vlan = native_vlan
+        self.allowed = allowed if allowed is not None else VlanRangeSet()
+        self.active = active if active is not None else VlanRangeSet()
+        self.forwarding = forwarding if forwarding is not None else VlanRangeSet()
+
+    def forwards(self, vlan):
+        """
+        Return True if the VLAN is forwarded (in spanning tree forwarding state and not pruned) on the trunk.
+        """
+        return vlan in self.forwarding
+
+    @property
+    def pruned(self):
+        """
+        VLANs that are allowed and active on the trunk but not forwarded (pruned or blocked).
+        """
+        return self.active - self.forwarding
+
+    def __repr__(self):
+        return (f"TrunkPort({self.port!r}, {self.mode!r}, {self.encapsulation!r}, {self.status!r}, "
+                f"{self.native_vlan!r})")
+
+def trunk_section(line):
+    """
+    Return the section name ("mode", "allowed", "active", "forwarding") if the line is a
+    section heading, else None.
+    """
+    stripped = line.strip()
+    if not stripped.startswith("Port"):
+        return None
+    heading = stripped[4:].lstrip()
+    for prefix, section in TRUNK_SECTIONS:
+        if heading.startswith(prefix):
+            return section
+    return None
+
+def iter_trunk_sections(lines):
+    """
+    Split 'show interfaces trunk' output into its sections, in one pass.
+
+    VLAN lists too long for one line are continued on indented lines; those are
+    joined back onto their port's row.
+
+    Yields:
+        tuple: (section name, port, rest of the row) for each row of every section.
+    """
+    for section, entry in iter_sections(iter_wrapped_entries(lines), lambda entry: trunk_section(entry[0])):
+        fields = entry[0].split(None, 1)
+        rest = (fields[1].strip() if len(fields) > 1 else "") + "".join(line.strip() for line in entry[1:])
+        yield section, fields[0], rest
+
+def iter_trunk_ports(lines):
+    """
+    Yield just the trunk port names from the first section of 'show interfaces trunk'.
+
+    Reading stops at the second section, so each trunk is returned once and the rest
+    of the output is not parsed.
+    """
+    for section, port, _ in iter_trunk_sections(lines):
+        if section != "mode":
+            break
+        yield port
+
+def parse_interface_trunk(lines):
+    """
+    Parse every section of 'show interfaces trunk' into TrunkPort records.
+
+    Parameters:
+        lines (iterable): Lines of the raw output (or the raw output as a str).
+
+    Returns:
+        dict: Port name, as shown -> TrunkPort, in the order shown.
+    """
+    trunks = {}
+    for section, port, rest in iter_trunk_sections(iter_lines(lines)):
+        trunk = trunks.get(port)
+        if trunk is None:
+            trunk = trunks[port] = TrunkPort(port)
+        if section == "mode":
+            fields = rest.split()
+            if len(fields) >= 4:
+                trunk.mode, trunk.encapsulation, trunk.status = fields[:3]
+                trunk.native_vlan = int(fields[3]) if fields[3].isdigit() else None
+        else:
+            setattr(trunk, section, VlanRangeSet.parse(rest))
+    return trunks
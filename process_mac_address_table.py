@@ -1,3 +1,193 @@
+import re
+import tempfile
+
+from classification_rules import current_rules
+from interface_names import PortIds
+from process_interface_trunk import iter_trunk_ports
+from process_vlan import VlanIndex, iter_parse_vlan
+from text_parsing import iter_lines, split_header
+
+# Remote entries are held in memory up to this size, then spill to a temporary file.
+REMOTE_SPOOL_MAX_SIZE = 1024 * 1024
+
+# A MAC address in Cisco dotted format, e.g. "0011.2233.4455".
+MAC_PATTERN = re.compile(r"\b([0-9a-fA-F]{4})\.([0-9a-fA-F]{4})\.([0-9a-fA-F]{4})\b")
+
+# Lines searched for the table heading; legends above it run to a few lines. An output
+# with no heading within them is parsed whole.
+MAC_HEADING_SEARCH_LINES = 20
+
+# A line continuing the port list of a multi-port entry (e.g. static multicast),
+# indented and holding only port names: "                         Gi1/0/3,Gi1/0/4".
+PORT_LIST_CONTINUATION = re.compile(r"\s+(?:[A-Za-z][\w-]*\d+(?:/\d+)*(?:\.\d+)?[,\s]*)+$")
+
+class MacEntry:
+    """
+    One entry of the MAC address table.
+    
+    Attributes:
+        vlan (int): VLAN number, or None for entries shown against "All" VLANs.
+        mac (int): The MAC address as a 48-bit integer.
+        type (str): Entry type, e.g. "DYNAMIC" or "STATIC".
+        port (str): Interface the address was learned on, as shown by the switch (the
+            first one for a multi-port entry).
+        ports (tuple): Every port of a multi-port entry, or None for the usual single port.
+        line (str): The entry as it appeared in the output (with any continuation lines),
+            or None if the entry was not parsed from the output.
+    
+    __slots__ keeps each entry small, which matters on core switches with 50k+ entries.
+    Entries compare and hash by vlan, mac, type and port, so two tables can be diffed as sets.
+    """
+    __slots__ = ("vlan", "mac", "type", "port", "ports", "line")
+    
+    def __init__(self, vlan, mac, type, port, ports=None, line=None):
+        self.vlan = vlan
+        self.mac = mac
+        self.type = type
+        self.port = port
+        self.ports = ports
+        self.line = line
+    
+    def key(self):
+        return (self.vlan, self.mac, self.type, self.port)
+    
+    def __eq__(self, other):
+        return isinstance(other, MacEntry) and self.key() == other.key()
+    
+    def __hash__(self):
+        return hash(self.key())
+    
+    def __repr__(self):
+        return f"MacEntry({self.vlan!r}, {format_mac(self.mac)!r}, {self.type!r}, {self.port!r})"
+    
+    def all_ports(self):
+        """
+        Return every port of the entry, as a tuple.
+        """
+        return self.ports if self.ports is not None else (self.port,)
+    
+    def render(self):
+        """
+        Return the entry as shown by 'show mac address-table': the original line, so
+        extra columns (age, secure, ...) and continued port lists are kept, or, for an
+        entry built in code, a line in the usual "vlan mac type port" layout.
+        """
+        if self.line is not None:
+            return self.line
+        vlan = "All" if self.vlan is None else str(self.vlan)
+        return f"{vlan:>4}    {format_mac(self.mac)}    {self.type:<12}{','.join(self.all_ports())}"
+
+def mac_to_int(mac):
+    """
+    Convert a MAC address in any common notation ("0011.2233.4455", "00:11:22:33:44:55",
+    "00-11-22-33-44-55") to a 48-bit integer.
+    """
+    digits = re.sub(r"[^0-9a-fA-F]", "", mac)
+    if len(digits) != 12:
+        raise ValueError(f"Not a MAC address: {mac!r}")
+    return int(digits, 16)
+
+def format_mac(mac):
+    """
+    Format a 48-bit integer MAC address in Cisco dotted format, e.g. "0011.2233.4455".
+    """
+    return mac.to_bytes(6, "big").hex(".", 2)
+
+def is_mac_table_heading(line):
+    """
+    Return True for the column heading of 'show mac address-table', in the layouts of
+    the various platforms ("Vlan    Mac Address       Type        Ports",
+    "   vlan   mac address     type    learn     age              ports", ...).
+    """
+    line = line.lower()
+    return "vlan" in line and "mac address" in line
+
+def mac_table_rows(lines):
+    """
+    Return an iterator over the lines after the heading of 'show mac address-table' (see
+    text_parsing.split_header), or over every line if the output has no heading.
+    """
+    _, rows = split_header(lines, is_mac_table_heading, MAC_HEADING_SEARCH_LINES)
+    return rows
+
+def parse_mac_address_table(lines):
+    """
+    Parse 'show mac address-table' output lines into MacEntry records, one per entry.
+    
+    Each entry line is found by its MAC address: the field before it is the VLAN, the
+    field after it is the type and the last field is the port. This also copes with
+    platforms that add age/secure columns. Lines up to the column heading are skipped
+    (see mac_table_rows), as are the footer and other lines without a MAC address.
+    
+    A multi-port entry lists its ports separated by commas ("Gi1/0/1,Gi1/0/2"), and
+    may continue the list on the following indented lines; those are added to the
+    entry's ports and line. Each entry keeps its original line for rendering.
+    
+    Parameters:
+        lines (iterable): Lines of the raw output from "show mac address-table".
+    
+    Yields:
+        MacEntry: Each entry in the table, in output order.
+    """
+    # An entry is held until the next line, which may continue its port list.
+    pending = None
+    for line in mac_table_rows(lines):
+        parts = line.split()
+        entry = None
+        # Fast path for the usual "vlan mac type port" layout.
+        if len(parts) == 4 and len(parts[1]) == 14 and parts[1][4] == "." and parts[1][9] == ".":
+            try:
+                mac = int(parts[1].replace(".", ""), 16)
+            except ValueError:
+                pass
+            else:
+                vlan = parts[0]
+                entry = MacEntry(int(vlan) if vlan.isdigit() else None, mac, parts[2], parts[3], line=line)
+                if "," in parts[3]:
+                    entry.ports = tuple(port for port in parts[3].split(",") if port)
+                    entry.port = entry.ports[0]
+        if entry is None:
+            match = MAC_PATTERN.search(line)
+            if match is not None:
+                before = line[:match.start()].split()
+                after = line[match.end():].split()
+                if before and len(after) >= 2:
+                    # The port list is the last field, plus any fields before it ending in ",".
+                    first = len(after) - 1
+                    while first > 1 and after[first - 1].endswith(","):
+                        first -= 1
+                    ports = tuple(port for port in ",".join(after[first:]).split(",") if port)
+                    vlan = before[-1].lstrip("*")
+                    entry = MacEntry(
+                        int(vlan) if vlan.isdigit() else None,
+                        int(match.group(1) + match.group(2) + match.group(3), 16),
+                        after[0],
+                        ports[0],
+                        ports if len(ports) > 1 else None,
+                        line,
+                    )
+        if entry is not None:
+            if pending is not None:
+                yield pending
+            pending = entry
+        elif pending is not None and PORT_LIST_CONTINUATION.match(line):
+            pending.ports = pending.all_ports() + tuple(port for port in line.replace(",", " ").split())
+            pending.line += "\n" + line
+        elif pending is not None:
+            yield pending
+            pending = None
+    if pending is not None:
+        yield pending
+
+def index_by_mac(entries):
+    """
+    Build a dictionary of MAC address (int) -> list of entries, for fast lookups.
+    """
+    index = {}
+    for entry in entries:
+        index.setdefault(entry.mac, []).append(entry)
+    return index
+
 def get_trunk_interfaces(raw_trunk_output):
     """
     Process the raw output of the 'show int trunk' command and extract the trunk interface names.
@@ -15,48 +205,99 @@ def get_trunk_interfaces(raw_trunk_output):
     Returns:
         list: A list of trunk interface identifiers (e.g. ['Gi7/0/2', 'Gi7/0/8', 'Gi8/1', 'Po1']).
     """
-    lines = raw_trunk_output.splitlines()
-    trunk_list = []
-    header_found = False
-    
-    for line in lines:
-        if not header_found:
-            if line.strip().startswith("Port"):
-                header_found = True
-            continue
-        
-        if not line.strip():
-            continue
-        
-        parts = line.split()
-        if parts:
-            trunk_list.append(parts[0])
+    return list(iter_trunk_interfaces(iter_lines(raw_trunk_output)))
+
+def iter_trunk_interfaces(lines):
+    """
+    Yield the trunk interface names from an iterable of 'show int trunk' output lines.
     
-    return trunk_list
+    Only the first section of the output is read, so each trunk is yielded once (see
+    process_interface_trunk for the other sections).
+    """
+    return iter_trunk_ports(lines)
 
 def normalize_interface_name(interface):
     """
     Normalize an interface name from the trunk output to match the MAC address table.
     
     Examples:
-      "Po1"   -> "Port-channel1"
-      "Gi8/1" -> "GigabitEthernet8/1"
-      "Te2/1" -> "TenGigabitEthernet2/1"
+      "Po1"    -> "Port-channel1"
+      "Gi8/1"  -> "GigabitEthernet8/1"
+      "Te2/1"  -> "TenGigabitEthernet2/1"
+      "Twe1/1" -> "TwentyFiveGigE1/1"
     
-    If no mapping is applicable, returns the original interface.
+    Every IOS/IOS-XE interface type is known (see interface_names), plus any extra
+    abbreviations from the rules file (see classification_rules).
+    If the name is not an interface of a known type, returns the original interface.
     """
-    mapping = {
-        "Po": "Port-channel",
-        "Gi": "GigabitEthernet",
-        "Te": "TenGigabitEthernet",
-        "Fa": "FastEthernet"
-    }
-    for prefix, full_name in mapping.items():
-        if interface.startswith(prefix):
-            return full_name + interface[len(prefix):]
-    return interface
+    return current_rules().normalize_interface(interface)
 
-def process_mac_address_table(raw_mac_output, raw_trunk_output):
+class PortClassifier:
+    """
+    Decide, per MAC table port, whether entries on it are local, remote (learned on a
+    trunk) or skipped.
+    
+    Trunk and MAC table ports are both interned to canonical integer port IDs (see
+    interface_names.PortIds), so "Po1", "Port-channel1" and "Gi1/0/1" vs
+    "GigabitEthernet1/0/1" compare equal whichever way each command writes them. The
+    answer is worked out once per distinct port name and kept in `classes`, so a table
+    with tens of thousands of entries costs one dict lookup per entry.
+    
+    Parameters:
+        trunk_interfaces (iterable): Trunk port names, in any naming form.
+        skip_ports (iterable): Port names whose entries are left out (the switch's own "CPU").
+            classify_entry() leaves out any entry whose line mentions one of them.
+    """
+    LOCAL = 0
+    REMOTE = 1
+    SKIPPED = 2
+    
+    def __init__(self, trunk_interfaces, skip_ports=("CPU",)):
+        self.ports = PortIds(normalize_interface_name)
+        self.trunk_ids = self.ports.port_ids(trunk_interfaces)
+        self.skip_ports = set(skip_ports)
+        # Port name as shown in the MAC table -> LOCAL, REMOTE or SKIPPED.
+        self.classes = {}
+    
+    def classify(self, port):
+        port_class = self.classes.get(port)
+        if port_class is None:
+            if port in self.skip_ports:
+                port_class = self.SKIPPED
+            elif self.ports.port_id(port) in self.trunk_ids:
+                port_class = self.REMOTE
+            else:
+                port_class = self.LOCAL
+            self.classes[port] = port_class
+        return port_class
+    
+    def classify_ports(self, ports):
+        """
+        Classify a multi-port entry: skipped if any port is, remote if every port is a trunk, local otherwise.
+        """
+        port_classes = set(map(self.classify, ports))
+        if self.SKIPPED in port_classes:
+            return self.SKIPPED
+        return self.REMOTE if port_classes == {self.REMOTE} else self.LOCAL
+    
+    def classify_entry(self, entry):
+        """
+        Classify a MacEntry by its ports (see classify_ports). As in the original report,
+        an entry whose line mentions a skip port anywhere (e.g. "CPU") is skipped too.
+        """
+        if entry.ports is None:
+            port_class = self.classes.get(entry.port)
+            if port_class is None:
+                port_class = self.classify(entry.port)
+        else:
+            port_class = self.classify_ports(entry.ports)
+        if port_class != self.SKIPPED and entry.line is not None:
+            for skip_port in self.skip_ports:
+                if skip_port in entry.line:
+                    return self.SKIPPED
+        return port_class
+
+def process_mac_address_table(raw_mac_output, raw_trunk_output, raw_vlan_output=None):
     """
     Process the raw output of the 'show mac address-table' command and separate the entries 
     into two sections:
@@ -65,67 +306,95 @@ def process_mac_address_table(raw_mac_output, raw_trunk_output):
     - "remotely learned mac addresses": entries whose interface is in the trunk list.
     
     Additionally:
-      - Any line containing "CPU" is skipped.
+      - Entries mentioning "CPU" are skipped.
+      - Each entry is parsed into a MacEntry record (see parse_mac_address_table) and
+        listed with its original line(s). A multi-port entry is remote only when all
+        of its ports are trunks.
       - The "local mac addresses:" section appears first in the output,
         followed by the "remotely learned mac addresses:" section.
+      - If the 'show vlan' output is given, a third section lists the local entries
+        learned in a VLAN that 'show vlan' does not put their port in.
     
-    This function now handles both the short (e.g. "Po2") and long (e.g. "Port-channel2") interface names.
+    Trunk and MAC table ports are compared by canonical name, so short (e.g. "Po2"), long
+    (e.g. "Port-channel2") and CDP-style ("Gig 1/0/2") interface names all match.
     
     Parameters:
         raw_mac_output (str): Raw output from "show mac address-table".
         raw_trunk_output (str): Raw output from "show int trunk".
+        raw_vlan_output (str): Raw output from "show vlan", optional.
     
     Returns:
-        str: A string containing two sections with appropriate headings.
+        str: A string containing two (or three) sections with appropriate headings.
     """
-    # Extract trunk interfaces from the trunk output.
-    trunk_interfaces = get_trunk_interfaces(raw_trunk_output)
-    
-    # Create a set that includes both the raw and normalized trunk interface names.
-    normalized_trunks = [normalize_interface_name(intf) for intf in trunk_interfaces]
-    trunk_check_set = set(trunk_interfaces) | set(normalized_trunks)
-    
-    # Split the MAC table output into lines and remove empty lines.
-    lines = [line for line in raw_mac_output.splitlines() if line.strip()]
+    vlan_lines = iter_lines(raw_vlan_output) if raw_vlan_output is not None else None
+    return "\n".join(iter_process_mac_address_table(iter_lines(raw_mac_output), iter_lines(raw_trunk_output),
+                                                    vlan_lines))
+
+def iter_process_mac_address_table(mac_lines, trunk_lines, vlan_lines=None):
+    """
+    Streaming version of process_mac_address_table.
     
-    # Filter out header/footer lines and any lines containing "CPU".
-    header_keywords = ["Mac Address", "Vlan", "----"]
-    data_lines = []
-    for line in lines:
-        if any(keyword in line for keyword in header_keywords):
-            continue
-        if "CPU" in line:
-            continue
-        data_lines.append(line)
+    Takes iterables of the 'show mac address-table' and 'show int trunk' output lines and
+    yields the processed output lines. Local entries are yielded as they are read, while
+    remote entries (and VLAN mismatches) are held in spooled temporary files until the
+    local section is done, so memory use stays flat however large the table is.
     
-    # Separate lines based on the interface (assumed to be in the last field).
-    local_macs = []
-    remote_macs = []
+    Parameters:
+        mac_lines (iterable): Lines of the raw output from "show mac address-table".
+        trunk_lines (iterable): Lines of the raw output from "show int trunk".
+        vlan_lines (iterable): Lines of the raw output from "show vlan", optional.
     
-    for line in data_lines:
-        parts = line.split()
-        if not parts:
-            continue
-        port = parts[-1]
-        # If the port is in our check set, classify as remote.
-        if port in trunk_check_set:
-            remote_macs.append(line)
-        else:
-            local_macs.append(line)
+    Yields:
+        str: Each line of the processed output.
+    """
+    # Extract trunk interfaces from the trunk output, as canonical port IDs.
+    port_classifier = PortClassifier(iter_trunk_interfaces(trunk_lines))
+    # Index the access ports of each VLAN, if 'show vlan' was collected.
+    vlan_index = VlanIndex(iter_parse_vlan(vlan_lines), normalize_interface_name) if vlan_lines is not None else None
     
     # Build the output with "local mac addresses:" appearing first.
-    output_sections = []
-    
-    output_sections.append("local mac addresses:")
-    if local_macs:
-        output_sections.extend(local_macs)
-    else:
-        output_sections.append("No local mac addresses found.")
-    
-    output_sections.append("\nremotely learned mac addresses:")
-    if remote_macs:
-        output_sections.extend(remote_macs)
-    else:
-        output_sections.append("No remotely learned mac addresses found.")
+    yield "local mac addresses:"
+    local_count = 0
+    remote_count = 0
+    mismatch_count = 0
     
-    return "\n".join(output_sections)
+    with tempfile.SpooledTemporaryFile(max_size=REMOTE_SPOOL_MAX_SIZE, mode="w+", newline="\n") as remote_macs, \
+            tempfile.SpooledTemporaryFile(max_size=REMOTE_SPOOL_MAX_SIZE, mode="w+", newline="\n") as mismatches:
+        for entry in parse_mac_address_table(mac_lines):
+            port_class = port_classifier.classify_entry(entry)
+            # Skip entries for the switch itself.
+            if port_class == PortClassifier.SKIPPED:
+                continue
+            # If the port is a trunk, classify as remote.
+            if port_class == PortClassifier.REMOTE:
+                remote_macs.write(entry.render() + "\n")
+                remote_count += 1
+            else:
+                line = entry.render()
+                yield line
+                local_count += 1
+                if vlan_index is not None and vlan_index.is_mismatch(entry.port, entry.vlan):
+                    mismatches.write(line + "\n")
+                    mismatch_count += 1
+        
+        if not local_count:
+            yield "No local mac addresses found."
+        
+        yield ""
+        yield "remotely learned mac addresses:"
+        if remote_count:
+            remote_macs.seek(0)
+            for line in remote_macs:
+                yield line[:-1]
+        else:
+            yield "No remotely learned mac addresses found."
+        
+        if vlan_index is not None:
+            yield ""
+            yield "local mac addresses in a vlan not assigned to their port:"
+            if mismatch_count:
+                mismatches.seek(0)
+                for line in mismatches:
+                    yield line[:-1]
+            else:
+                yield "No vlan mismatches found."
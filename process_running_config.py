@@ -0,0 +1,35 @@
+from text_parsing import iter_lines
+
+def iter_channel_members(lines):
+    """
+    Find the EtherChannel members in a running-config, in one pass.
+
+    A member port has a "channel-group <n> mode ..." line under its interface section;
+    it belongs to Port-channel<n>.
+
+    Parameters:
+        lines (iterable): Lines of the running-config.
+
+    Yields:
+        tuple: (member interface, "Port-channel<n>"), as named in the config.
+    """
+    interface = None
+    for line in lines:
+        if line.startswith("interface "):
+            interface = line[len("interface "):].strip()
+        elif not line.startswith(" "):
+            # "!" or any other top-level line ends the interface section.
+            interface = None
+        elif interface is not None:
+            words = line.split()
+            if len(words) >= 2 and words[0] == "channel-group" and words[1].isdigit():
+                yield interface, f"Port-channel{words[1]}"
+
+def parse_channel_members(raw_output):
+    """
+    Return the EtherChannel members of a running-config as a dict of Port-channel -> list of member interfaces.
+    """
+    channels = {}
+    for interface, channel in iter_channel_members(iter_lines(raw_output)):
+        channels.setdefault(channel, []).append(interface)
+    return channels
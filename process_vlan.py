@@ -0,0 +1,138 @@
+from interface_names import canonical_interface_name
+from text_parsing import column_offsets, iter_lines, slice_columns, split_header, starts_with
+from vlan_ranges import VlanRangeSet
+
+# Column headings of the first section of 'show vlan', in order.
+VLAN_COLUMNS = ("VLAN", "Name", "Status", "Ports")
+
+class VlanEntry:
+    """
+    One VLAN from the first section of 'show vlan'.
+
+    Attributes:
+        vlan (int): VLAN number.
+        name (str): VLAN name (truncated by IOS to the column width).
+        status (str): e.g. "active", "act/unsup", "suspended".
+        ports (list): Access ports in the VLAN, as shown, e.g. ["Gi1/0/1", "Gi1/0/2"].
+    """
+    __slots__ = ("vlan", "name", "status", "ports")
+
+    def __init__(self, vlan, name, status, ports=None):
+        self.vlan = vlan
+        self.name = name
+        self.status = status
+        self.ports = ports if ports is not None else []
+
+    def __repr__(self):
+        return f"VlanEntry({self.vlan!r}, {self.name!r}, {self.status!r}, {self.ports!r})"
+
+def split_ports(text):
+    """
+    Split a 'show vlan' port list ("Gi1/0/1, Gi1/0/2, Gi1/0/3") into port names.
+    """
+    return [port.strip() for port in text.split(",") if port.strip()]
+
+def iter_parse_vlan(lines):
+    """
+    Parse the first section of 'show vlan' into VlanEntry records, in one pass.
+
+    On large stacks a VLAN's port list wraps over many lines; each continuation line is
+    indented under the Ports column and its ports are added to the VLAN above. Reading
+    stops at the end of the first section (the "VLAN Type ..." heading), so the MTU,
+    RSPAN and private VLAN sections are not parsed.
+
+    Parameters:
+        lines (iterable): Lines of the raw output.
+
+    Yields:
+        VlanEntry: Each VLAN, in the order shown.
+    """
+    heading, lines = split_header(lines, starts_with("VLAN"))
+    if heading is None:
+        return
+    offsets = column_offsets(heading, VLAN_COLUMNS)
+    entry = None
+    for line in lines:
+        if not line.strip() or line.startswith("----"):
+            continue
+        if line[0].isdigit():
+            if entry is not None:
+                yield entry
+            vlan, name, status, ports = slice_columns(line.rstrip(), offsets)
+            entry = VlanEntry(int(vlan), name, status, split_ports(ports)) if vlan.isdigit() else None
+        elif line[0].isspace():
+            # Continuation of the port list of the VLAN above.
+            if entry is not None:
+                entry.ports.extend(split_ports(line))
+        else:
+            # The next section's heading.
+            break
+    if entry is not None:
+        yield entry
+
+class VlanIndex:
+    """
+    Port <-> VLAN lookups built from 'show vlan'.
+
+    Ports are keyed by canonical name (see interface_names), so "Gi1/0/1" from
+    'show vlan' and "GigabitEthernet1/0/1" from a MAC table are the same port. A port
+    configured with a voice VLAN is listed under both its data and voice VLAN, so a
+    port can have more than one VLAN.
+
+    Parameters:
+        entries (iterable): VlanEntry records.
+        normalize (callable): Turns a port name into its canonical form.
+
+    Attributes:
+        vlans (dict): VLAN number -> VlanEntry.
+        port_vlans (dict): Canonical port name -> set of VLAN numbers.
+        defined (VlanRangeSet): Every VLAN defined on the switch.
+    """
+
+    def __init__(self, entries, normalize=canonical_interface_name):
+        self.normalize = normalize
+        self.vlans = {}
+        self.port_vlans = {}
+        for entry in entries:
+            self.vlans[entry.vlan] = entry
+            for port in entry.ports:
+                self.port_vlans.setdefault(normalize(port), set()).add(entry.vlan)
+        self.defined = VlanRangeSet((vlan, vlan) for vlan in self.vlans)
+        # Port name as looked up -> its VLAN set, so each name is normalized once.
+        self._seen = {}
+
+    @classmethod
+    def from_output(cls, raw_output, normalize=canonical_interface_name):
+        """
+        Build the index from 'show vlan' output (a str or an iterable of lines).
+        """
+        return cls(iter_parse_vlan(iter_lines(raw_output)), normalize)
+
+    def vlans_of(self, port):
+        """
+        Return the set of VLANs a port is in, or None if 'show vlan' does not list the port
+        (e.g. a trunk).
+        """
+        try:
+            return self._seen[port]
+        except KeyError:
+            vlans = self._seen[port] = self.port_vlans.get(self.normalize(port))
+            return vlans
+
+    def ports_in(self, vlan):
+        """
+        Return the ports in a VLAN, as shown by 'show vlan'.
+        """
+        entry = self.vlans.get(vlan)
+        return list(entry.ports) if entry is not None else []
+
+    def is_mismatch(self, port, vlan):
+        """
+        Return True if an address learned on port in vlan contradicts 'show vlan': the port
+        is listed, but not under that VLAN. Unlisted ports and entries without a VLAN are
+        never mismatches.
+        """
+        if vlan is None:
+            return False
+        vlans = self.vlans_of(port)
+        return vlans is not None and vlan not in vlans
@@ -0,0 +1,103 @@
+"""
+Registry of processed reports.
+
+Each report (processor) declares the raw CLI commands it needs, the filename part
+used for its output file and the function that builds it. The function is called
+with one iterator of lines per raw output, in the same order as the declared
+commands, and yields the lines to save. Working line by line keeps memory flat on
+large outputs.
+
+The collectors only look at this registry: they build the list of raw commands to
+fetch from it and start each processor as soon as its raw outputs have arrived.
+Adding a new report is a matter of registering it here, e.g.
+
+    @register_processor('non_standard_interfaces', 'non_standard_interfaces',
+                        requires=['show int status', 'sh running-config'])
+    def non_standard_interfaces(int_status_lines, running_config_lines):
+        ...
+"""
+from process_cdp_neighbors import iter_process_cdp_neighbors, iter_process_cdp_neighbors_detail
+from process_interface_status import iter_parse_interface_status, iter_process_interface_status
+from mac_table import iter_process_mac_address_table_bulk
+from process_mac_address_table import iter_process_mac_address_table
+
+# Marker name -> {'requires': [raw CLI commands], 'filename': str, 'function': callable}
+PROCESSORS = {}
+
+
+def register_processor(name, filename, requires):
+    """
+    Decorator registering a report function under a marker name.
+
+    Parameters:
+        name (str): Marker name used in command lists (e.g. 'process_cdp_neighbors').
+        filename (str): Filename part of the output file (e.g. 'cdp_neighbors_processed').
+        requires (list): Raw CLI commands whose output lines are passed to the function, in order.
+    """
+    def decorator(function):
+        PROCESSORS[name] = {
+            'requires': list(requires),
+            'filename': filename,
+            'function': function,
+        }
+        return function
+    return decorator
+
+
+def required_commands(command):
+    """
+    Return the raw CLI commands a command or marker needs. A plain command just needs itself.
+    """
+    processor = PROCESSORS.get(command)
+    if processor is None:
+        return [command]
+    return processor['requires']
+
+
+def run_processor(command, lines):
+    """
+    Produce the output lines to save for a command or marker.
+
+    Parameters:
+        command (str): A CLI command or a registered marker name.
+        lines (callable): Takes a raw CLI command and returns an iterator over its output lines.
+
+    Returns:
+        iterator: The (processed) output lines for the command.
+    """
+    processor = PROCESSORS.get(command)
+    if processor is None:
+        return lines(command)
+    # Open the raw outputs the marker depends on, in the declared order.
+    raw_lines = [lines(raw_command) for raw_command in processor['requires']]
+    return processor['function'](*raw_lines)
+
+
+register_processor('process_cdp_neighbors', 'cdp_neighbors_processed',
+                   requires=['show cdp neighbors'])(iter_process_cdp_neighbors)
+
+register_processor('process_cdp_neighbors_detail', 'cdp_neighbors_detail_processed',
+                   requires=['show cdp neighbors detail'])(iter_process_cdp_neighbors_detail)
+
+
+@register_processor('filter_int_status_10mb', '10mb_interfaces', requires=['show int status'])
+def filter_int_status_10mb(int_status_lines):
+    """
+    Keep only the rows of 'show int status' for ports running at 10 Mb.
+
+    The speed is read from the Speed column, so a description mentioning "a-10 " does not match.
+    """
+    return (interface.text for interface in iter_parse_interface_status(int_status_lines)
+            if interface.speed_mbps == 10)
+
+
+register_processor('interface_status_exceptions', 'interface_status_exceptions',
+                   requires=['show int status'])(iter_process_interface_status)
+
+
+register_processor('process_mac_address_table', 'mac_address_table_processed',
+                   requires=['show mac address-table', 'show int trunk', 'show vlan'])(iter_process_mac_address_table)
+
+# Same report, built column-wise in memory: faster on core switches with very large tables.
+register_processor('process_mac_address_table_bulk', 'mac_address_table_processed',
+                   requires=['show mac address-table', 'show int trunk', 'show vlan'])(iter_process_mac_address_table_bulk)
@@ -0,0 +1,396 @@
+"""
+SQLite index of the parsed records of every collection.
+
+The text reports are written for people; answering "which port is MAC X on,
+anywhere in the estate" from them means grepping thousands of files. RecordIndex
+loads the parsed MAC table, CDP neighbors, trunks, VLANs, interface status and
+EtherChannel members (from the running-config) of each switch into one SQLite
+database with indexes on the columns that get looked up (MAC address, CDP device
+ID, interface, status), so such questions are a query taking milliseconds:
+
+    records = RecordIndex(os.path.join(output_dir, "records.sqlite"))
+    records.load_outputs(host, date_str, {"show mac address-table": path, ...})
+    records.find_mac("0011.2233.4455")
+
+Each switch and date is one collection; loading the same switch and date again
+replaces it. Interfaces are stored as shown and in canonical form (column
+"interface", see interface_names), so tables can be joined on a port whichever
+way each command writes it. MAC addresses are stored as 48-bit integers.
+
+The records are parsed with the same parsers as the reports (process_*.py).
+Existing output files can be loaded from the command line:
+
+    python record_index.py records.sqlite load /srv/cisco-output/*_20261015_*.txt
+    python record_index.py records.sqlite mac 0011.2233.4455
+    python record_index.py records.sqlite device SW-CORE01
+"""
+import argparse
+import contextlib
+import datetime
+import os
+import re
+import sqlite3
+import sys
+import threading
+
+from classification_rules import current_rules
+from output_files import strip_compression
+from process_cdp_neighbors import iter_parse_cdp_neighbors, iter_parse_cdp_neighbors_detail
+from process_interface_status import iter_parse_interface_status
+from process_interface_trunk import parse_interface_trunk
+from process_mac_address_table import PortClassifier, format_mac, mac_to_int, parse_mac_address_table
+from process_running_config import iter_channel_members
+from process_vlan import iter_parse_vlan
+from text_parsing import read_lines
+
+# Full form of the raw commands whose output is loaded; any IOS abbreviation of them matches.
+MAC_TABLE_COMMAND = "show mac address-table"
+TRUNK_COMMAND = "show interfaces trunk"
+VLAN_COMMAND = "show vlan"
+CDP_COMMAND = "show cdp neighbors"
+CDP_DETAIL_COMMAND = "show cdp neighbors detail"
+INT_STATUS_COMMAND = "show interfaces status"
+RUNNING_CONFIG_COMMAND = "show running-config"
+
+# Raw commands to collect as well when loading records, beyond the reports' own:
+# only the detail output has the neighbors' IP addresses, which mac_locator needs to
+# follow a hop to a switch inventoried by management IP.
+RECORD_COMMANDS = [CDP_DETAIL_COMMAND]
+
+# How a MAC table entry was learned, from PortClassifier.
+LEARNED = {PortClassifier.LOCAL: "local", PortClassifier.REMOTE: "remote", PortClassifier.SKIPPED: "skipped"}
+
+# Seconds a writer waits for another one to finish before giving up.
+SQLITE_TIMEOUT = 60
+
+# Collector output filename: host, date, output name.
+OUTPUT_FILENAME_PATTERN = re.compile(r"(.+)_(\d{8})_(.+)\.txt")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS collections (
+    id INTEGER PRIMARY KEY,
+    host TEXT NOT NULL,
+    date TEXT NOT NULL,
+    loaded_at TEXT NOT NULL,
+    UNIQUE (host, date)
+);
+CREATE TABLE IF NOT EXISTS mac_entries (
+    collection_id INTEGER NOT NULL REFERENCES collections (id),
+    vlan INTEGER,
+    mac INTEGER NOT NULL,
+    type TEXT,
+    port TEXT,
+    interface TEXT,
+    learned TEXT
+);
+CREATE INDEX IF NOT EXISTS mac_entries_by_mac ON mac_entries (mac);
+CREATE INDEX IF NOT EXISTS mac_entries_by_interface ON mac_entries (collection_id, interface);
+CREATE TABLE IF NOT EXISTS cdp_neighbors (
+    collection_id INTEGER NOT NULL REFERENCES collections (id),
+    device_id TEXT NOT NULL,
+    local_interface TEXT,
+    interface TEXT,
+    holdtime INTEGER,
+    capability TEXT,
+    platform TEXT,
+    port_id TEXT,
+    ip_address TEXT,
+    category TEXT
+);
+CREATE INDEX IF NOT EXISTS cdp_neighbors_by_device ON cdp_neighbors (device_id);
+CREATE INDEX IF NOT EXISTS cdp_neighbors_by_interface ON cdp_neighbors (collection_id, interface);
+CREATE TABLE IF NOT EXISTS trunks (
+    collection_id INTEGER NOT NULL REFERENCES collections (id),
+    port TEXT NOT NULL,
+    interface TEXT,
+    mode TEXT,
+    encapsulation TEXT,
+    status TEXT,
+    native_vlan INTEGER,
+    allowed TEXT,
+    active TEXT,
+    forwarding TEXT
+);
+CREATE INDEX IF NOT EXISTS trunks_by_interface ON trunks (collection_id, interface);
+CREATE TABLE IF NOT EXISTS vlans (
+    collection_id INTEGER NOT NULL REFERENCES collections (id),
+    vlan INTEGER NOT NULL,
+    name TEXT,
+    status TEXT
+);
+CREATE INDEX IF NOT EXISTS vlans_by_vlan ON vlans (collection_id, vlan);
+CREATE TABLE IF NOT EXISTS vlan_ports (
+    collection_id INTEGER NOT NULL REFERENCES collections (id),
+    vlan INTEGER NOT NULL,
+    port TEXT NOT NULL,
+    interface TEXT
+);
+CREATE INDEX IF NOT EXISTS vlan_ports_by_interface ON vlan_ports (collection_id, interface);
+CREATE TABLE IF NOT EXISTS interface_status (
+    collection_id INTEGER NOT NULL REFERENCES collections (id),
+    port TEXT NOT NULL,
+    interface TEXT,
+    name TEXT,
+    status TEXT,
+    vlan TEXT,
+    duplex TEXT,
+    speed TEXT,
+    speed_mbps INTEGER,
+    type TEXT
+);
+CREATE INDEX IF NOT EXISTS interface_status_by_interface ON interface_status (collection_id, interface);
+CREATE INDEX IF NOT EXISTS interface_status_by_status ON interface_status (status);
+CREATE TABLE IF NOT EXISTS channel_members (
+    collection_id INTEGER NOT NULL REFERENCES collections (id),
+    interface TEXT NOT NULL,
+    channel TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS channel_members_by_channel ON channel_members (collection_id, channel);
+CREATE VIEW IF NOT EXISTS latest_collections AS
+    SELECT * FROM collections AS c WHERE date = (SELECT MAX(date) FROM collections WHERE host = c.host);
+"""
+
+# Tables holding the records of a collection, cleared when it is loaded again.
+RECORD_TABLES = ("mac_entries", "cdp_neighbors", "trunks", "vlans", "vlan_ports", "interface_status",
+                 "channel_members")
+
+
+def abbreviates(command, full_command):
+    """
+    Return True if command is full_command or an IOS abbreviation of it, word by word
+    ("sh int trunk" for "show interfaces trunk").
+    """
+    words, full_words = command.lower().split(), full_command.split()
+    return len(words) == len(full_words) and all(full.startswith(word) for word, full in zip(words, full_words))
+
+
+class MacSighting:
+    """
+    Where one switch has a MAC address in its table.
+
+    Attributes:
+        host (str): The switch.
+        date (str): Date of the collection (YYYYMMDD).
+        vlan (int): VLAN, or None for "All".
+        mac (int): The MAC address as a 48-bit integer.
+        type (str): e.g. "DYNAMIC".
+        port (str): Port as shown in the MAC table.
+        interface (str): Canonical name of the port.
+        learned (str): "local", "remote" (on a trunk) or "skipped"; None if the trunks were not collected.
+    """
+    __slots__ = ("host", "date", "vlan", "mac", "type", "port", "interface", "learned")
+
+    def __init__(self, host, date, vlan, mac, type, port, interface, learned):
+        self.host = host
+        self.date = date
+        self.vlan = vlan
+        self.mac = mac
+        self.type = type
+        self.port = port
+        self.interface = interface
+        self.learned = learned
+
+    def __repr__(self):
+        return (f"MacSighting({self.host!r}, {self.date!r}, {self.vlan!r}, {format_mac(self.mac)!r}, "
+                f"{self.port!r}, {self.learned!r})")
+
+
+class RecordIndex:
+    """
+    The SQLite database of parsed records.
+
+    Loading is serialised within the process (SQLite allows one writer at a time), so
+    one RecordIndex can be shared by all the collection threads.
+
+    Parameters:
+        path (str): The database file, created if missing.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._write_lock = threading.Lock()
+        with self.connect() as db:
+            db.execute("PRAGMA journal_mode = WAL")
+            db.executescript(SCHEMA)
+
+    @contextlib.contextmanager
+    def connect(self):
+        """
+        Context manager yielding a connection, committed on success. Use it for ad hoc queries.
+        """
+        db = sqlite3.connect(self.path, timeout=SQLITE_TIMEOUT)
+        try:
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    def load_outputs(self, host, date_str, outputs):
+        """
+        Parse a switch's raw outputs and load the records, replacing any earlier load of
+        the same switch and date.
+
+        Parameters:
+            host (str): The switch.
+            date_str (str): Date of the collection (YYYYMMDD).
+            outputs (dict): Raw CLI command (any abbreviation) -> path of its output file.
+                Commands with no records to load are ignored.
+
+        Returns:
+            dict: Table name -> number of records loaded.
+        """
+        def find(full_command):
+            for command, file_path in outputs.items():
+                if abbreviates(command, full_command):
+                    return file_path
+            return None
+
+        normalize = current_rules().normalize_interface
+        mac_path, trunk_path, vlan_path = find(MAC_TABLE_COMMAND), find(TRUNK_COMMAND), find(VLAN_COMMAND)
+        cdp_path, cdp_detail_path = find(CDP_COMMAND), find(CDP_DETAIL_COMMAND)
+        status_path = find(INT_STATUS_COMMAND)
+        config_path = find(RUNNING_CONFIG_COMMAND)
+
+        # Parse everything before taking the write lock.
+        trunks = parse_interface_trunk(read_lines(trunk_path)) if trunk_path else None
+        rows = {}
+        if mac_path:
+            classifier = PortClassifier(trunks) if trunks is not None else None
+            rows["mac_entries"] = [
+                (entry.vlan, entry.mac, entry.type, entry.port, normalize(entry.port),
+                 LEARNED[classifier.classify_entry(entry)] if classifier is not None else None)
+                for entry in parse_mac_address_table(read_lines(mac_path))]
+        if trunks is not None:
+            rows["trunks"] = [
+                (trunk.port, normalize(trunk.port), trunk.mode, trunk.encapsulation, trunk.status,
+                 trunk.native_vlan, str(trunk.allowed), str(trunk.active), str(trunk.forwarding))
+                for trunk in trunks.values()]
+        if vlan_path:
+            vlans = list(iter_parse_vlan(read_lines(vlan_path)))
+            rows["vlans"] = [(entry.vlan, entry.name, entry.status) for entry in vlans]
+            rows["vlan_ports"] = [(entry.vlan, port, normalize(port)) for entry in vlans for port in entry.ports]
+        # The detail output has the neighbors' IP addresses, so it is preferred when both were collected.
+        if cdp_detail_path:
+            neighbors = iter_parse_cdp_neighbors_detail(read_lines(cdp_detail_path))
+        elif cdp_path:
+            neighbors = iter_parse_cdp_neighbors(read_lines(cdp_path))
+        else:
+            neighbors = None
+        if neighbors is not None:
+            rules = current_rules()
+            rows["cdp_neighbors"] = [
+                (neighbor.device_id, neighbor.local_interface, normalize(neighbor.local_interface),
+                 neighbor.holdtime, neighbor.capability, neighbor.platform, neighbor.port_id,
+                 neighbor.ip_address, rules.classify_cdp(neighbor))
+                for neighbor in neighbors]
+        if status_path:
+            rows["interface_status"] = [
+                (interface.port, normalize(interface.port), interface.name, interface.status, interface.vlan,
+                 interface.duplex, interface.speed, interface.speed_mbps, interface.type)
+                for interface in iter_parse_interface_status(read_lines(status_path))]
+        if config_path:
+            rows["channel_members"] = [(normalize(interface), channel)
+                                       for interface, channel in iter_channel_members(read_lines(config_path))]
+
+        with self._write_lock, self.connect() as db:
+            collection_id = self._replace_collection(db, host, date_str)
+            for table, table_rows in rows.items():
+                if table_rows:
+                    placeholders = ", ".join("?" * (len(table_rows[0]) + 1))
+                    db.executemany(f"INSERT INTO {table} VALUES ({placeholders})",
+                                   [(collection_id,) + row for row in table_rows])
+        return {table: len(table_rows) for table, table_rows in rows.items()}
+
+    def _replace_collection(self, db, host, date_str):
+        row = db.execute("SELECT id FROM collections WHERE host = ? AND date = ?", (host, date_str)).fetchone()
+        if row is not None:
+            for table in RECORD_TABLES:
+                db.execute(f"DELETE FROM {table} WHERE collection_id = ?", (row[0],))
+            db.execute("DELETE FROM collections WHERE id = ?", (row[0],))
+        cursor = db.execute("INSERT INTO collections (host, date, loaded_at) VALUES (?, ?, ?)",
+                            (host, date_str, datetime.datetime.now().isoformat(timespec="seconds")))
+        return cursor.lastrowid
+
+    def load_files(self, file_paths):
+        """
+        Load collector output files, grouped by the switch and date in their names
+        ("SW01_20261015_show_vlan.txt"). Processed reports and other outputs are ignored.
+
+        Returns:
+            list: (host, date) of each collection loaded.
+        """
+        collections = {}
+        for file_path in file_paths:
+            match = OUTPUT_FILENAME_PATTERN.fullmatch(strip_compression(os.path.basename(file_path)))
+            if match is not None:
+                host, date_str, name = match.groups()
+                collections.setdefault((host, date_str), {})[name.replace("_", " ")] = file_path
+        for (host, date_str), outputs in collections.items():
+            self.load_outputs(host, date_str, outputs)
+        return list(collections)
+
+    def find_mac(self, mac, latest=True):
+        """
+        Find a MAC address in every switch's table.
+
+        Parameters:
+            mac (str or int): The address, in any common notation, or as a 48-bit integer.
+            latest (bool): Only look at the latest collection of each switch.
+
+        Returns:
+            list: MacSighting records, local entries first, then by switch.
+        """
+        if isinstance(mac, str):
+            mac = mac_to_int(mac)
+        collections = "latest_collections" if latest else "collections"
+        with self.connect() as db:
+            rows = db.execute(
+                "SELECT c.host, c.date, m.vlan, m.mac, m.type, m.port, m.interface, m.learned "
+                f"FROM mac_entries AS m JOIN {collections} AS c ON c.id = m.collection_id WHERE m.mac = ? "
+                "ORDER BY m.learned IS NOT 'local', c.host, c.date", (mac,)).fetchall()
+        return [MacSighting(*row) for row in rows]
+
+    def find_cdp_neighbor(self, device_id, latest=True):
+        """
+        Find the switches that see a CDP neighbor, by device ID (a "%" in it matches anything).
+
+        Returns:
+            list: (host, date, local interface, device ID, platform, neighbor port, IP address) tuples.
+        """
+        collections = "latest_collections" if latest else "collections"
+        with self.connect() as db:
+            return db.execute(
+                "SELECT c.host, c.date, n.local_interface, n.device_id, n.platform, n.port_id, n.ip_address "
+                f"FROM cdp_neighbors AS n JOIN {collections} AS c ON c.id = n.collection_id "
+                "WHERE n.device_id LIKE ? ORDER BY c.host, c.date, n.interface", (device_id,)).fetchall()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load and query parsed switch records.")
+    parser.add_argument("database", help="The SQLite database.")
+    commands = parser.add_subparsers(dest="action", required=True)
+    load_parser = commands.add_parser("load", help="Load collector output files.")
+    load_parser.add_argument("files", nargs="+")
+    mac_parser = commands.add_parser("mac", help="Find a MAC address.")
+    mac_parser.add_argument("mac")
+    mac_parser.add_argument("--all", action="store_true", help="Every collection, not just the latest.")
+    device_parser = commands.add_parser("device", help="Find a CDP neighbor by device ID.")
+    device_parser.add_argument("device_id")
+    args = parser.parse_args(argv)
+
+    records = RecordIndex(args.database)
+    if args.action == "load":
+        for host, date_str in records.load_files(args.files):
+            print(f"{host} {date_str}")
+    elif args.action == "mac":
+        for sighting in records.find_mac(args.mac, latest=not args.all):
+            vlan = "All" if sighting.vlan is None else sighting.vlan
+            print(f"{sighting.host:<24} {sighting.date}  {vlan:>4}  {sighting.port:<24} {sighting.learned or ''}")
+    else:
+        for row in records.find_cdp_neighbor(args.device_id):
+            print("  ".join(str(value) if value is not None else "" for value in row))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,239 @@
+"""
+Shared helpers for parsing IOS show command output.
+
+Every processor works on a stream of lines (see processors.py), so the helpers here
+take and return iterators of lines and never need the whole output in memory:
+
+    lines = iter_lines(raw_output)                         # str, file or iterable -> lines
+    heading, rows = split_header(lines, is_header)         # heading line and the rows after it
+    rows = iter_after_header(lines, is_header)             # or just skip up to the heading line
+    for section, row in iter_sections(lines, section_of): ...  # outputs with several headed sections
+    for entry in iter_merge_wrapped_lines(rows): ...       # join indented continuation lines
+    offsets = column_offsets(heading_line, headings)       # column start of each heading
+    fields = slice_columns(line, offsets)                  # fixed-width row -> field values
+
+They sit on the hot path of every report, so keep them lean; bench_text_parsing.py
+times them on synthetic output.
+"""
+import functools
+import itertools
+import operator
+import re
+
+from output_files import open_input
+
+
+def iter_lines(source):
+    """
+    Return an iterator over the lines of source, without line endings.
+
+    Parameters:
+        source: Raw output as a str, an open text file, or an iterable of lines.
+    """
+    if isinstance(source, str):
+        return iter(source.splitlines())
+    if hasattr(source, "read"):
+        return (line[:-1] if line.endswith("\n") else line for line in source)
+    return iter(source)
+
+
+def read_lines(file_path):
+    """
+    Yield the lines of a file one at a time, without their line endings.
+
+    Compressed output files (".gz", ".zst") are decompressed as they are read.
+    """
+    with open_input(file_path) as file:
+        for line in file:
+            yield line[:-1] if line.endswith("\n") else line
+
+
+def split_header(lines, is_header, search_lines=None):
+    """
+    Find the heading line of an output, for parsers that need it (e.g. for column offsets).
+
+    Parameters:
+        lines (iterable): Lines of the raw output.
+        is_header (callable): Takes a line and returns True for the heading line.
+        search_lines (int): Optional, only look for the heading in this many first lines.
+            If it is not among them, the output is taken to have no heading and no line
+            is skipped. Without it, an output with no heading has no rows.
+
+    Returns:
+        tuple: (heading line or None, iterator over the lines after the heading).
+    """
+    lines = iter(lines)
+    if search_lines is None:
+        for line in lines:
+            if is_header(line):
+                return line, lines
+        return None, lines
+    skipped = []
+    for line in lines:
+        if is_header(line):
+            return line, lines
+        skipped.append(line)
+        if len(skipped) >= search_lines:
+            break
+    return None, itertools.chain(skipped, lines)
+
+
+def iter_after_header(lines, is_header, search_lines=None):
+    """
+    Yield the lines after the first heading line, skipping it and everything before it
+    (see split_header).
+
+    Parameters:
+        lines (iterable): Lines of the raw output.
+        is_header (callable): Takes a line and returns True for the heading line.
+        search_lines (int): Optional, only look for the heading in this many first lines.
+    """
+    _, rows = split_header(lines, is_header, search_lines)
+    yield from rows
+
+
+def iter_sections(lines, section_of):
+    """
+    Split an output made of several headed sections (e.g. 'show interfaces trunk'), in one pass.
+
+    Parameters:
+        lines (iterable): Lines of the raw output, or entries (see iter_wrapped_entries).
+        section_of (callable): Takes a line and returns the section name if it is a
+            section heading, else None.
+
+    Yields:
+        tuple: (section name, line) for every line after the first heading; the
+            headings themselves and anything before the first one are skipped.
+    """
+    section = None
+    for line in lines:
+        heading = section_of(line)
+        if heading is not None:
+            section = heading
+        elif section is not None:
+            yield section, line
+
+
+def starts_with(prefix):
+    """
+    Return a heading test for iter_after_header: the stripped line starts with prefix.
+    """
+    return lambda line: line.lstrip().startswith(prefix)
+
+
+def iter_wrapped_entries(lines):
+    """
+    Group lines into entries: a line and the indented lines continuing it.
+
+    Blank lines are skipped and do not end an entry.
+
+    Yields:
+        list: The raw lines of each entry, first line first.
+    """
+    entry = []
+    for line in lines:
+        if not line or line.isspace():
+            continue
+        # Indented lines continue the previous entry.
+        if line[0].isspace() and entry:
+            entry.append(line)
+            continue
+        if entry:
+            yield entry
+        entry = [line]
+    if entry:
+        yield entry
+
+
+def iter_merge_wrapped_lines(lines):
+    """
+    Merge wrapped lines from an iterable of raw output lines, yielding each merged line.
+
+    If a line starts with whitespace, it is assumed to be a continuation of the previous line.
+    """
+    current_line = ""
+    for line in lines:
+        # If line is empty, skip it.
+        if not line or line.isspace():
+            continue
+        # If the line starts with whitespace, it is a continuation.
+        if line[0].isspace():
+            current_line += " " + line.strip()
+        else:
+            # If there's an existing line, yield it.
+            if current_line:
+                yield current_line
+            current_line = line.strip()
+    # Yield the last line if exists.
+    if current_line:
+        yield current_line
+
+
+def merge_wrapped_lines(raw_output):
+    """
+    Merge wrapped lines from the raw output.
+
+    If a line starts with whitespace, it is assumed to be a continuation of the previous line.
+    Returns a list of merged lines.
+    """
+    return list(iter_merge_wrapped_lines(raw_output.splitlines()))
+
+
+def column_offsets(header_line, headings):
+    """
+    Return the start offset of each heading in a heading line, or None if any is missing.
+
+    Parameters:
+        header_line (str): The heading line of a fixed-width table.
+        headings (sequence): Column headings in left-to-right order.
+    """
+    offsets = []
+    start = 0
+    for heading in headings:
+        offset = header_line.find(heading, start)
+        if offset < 0:
+            return None
+        offsets.append(offset)
+        start = offset + len(heading)
+    return tuple(offsets)
+
+
+@functools.lru_cache(maxsize=64)
+def _column_slicer(offsets):
+    # A line is aligned when, at every cut, the character before or at the cut is a
+    # space; one precompiled pattern checks that for all cuts at once. itemgetter then
+    # takes every field with one C call.
+    cuts = offsets[1:]
+    aligned = re.compile("".join(f"(?=.{{{cut - 1}}}(?: |. ))" for cut in cuts))
+    slices = [slice(start, end) for start, end in zip((0,) + cuts, cuts + (None,))]
+    if len(slices) == 1:
+        return aligned, lambda line: (line[slices[0]],)
+    return aligned, operator.itemgetter(*slices)
+
+
+def slice_columns(line, offsets):
+    """
+    Cut a fixed-width line into stripped fields at the given column offsets.
+
+    A value wider than its column pushes the rest of the line to the right, so a cut
+    that falls inside a word is moved to the end of that word.
+
+    Parameters:
+        line (str): One row of the table.
+        offsets (tuple): Start offset of each column, as returned by column_offsets.
+
+    Returns:
+        list: One stripped string per column ("" where the row has no value).
+    """
+    aligned, fields = _column_slicer(offsets)
+    if aligned.match(line):
+        return list(map(str.strip, fields(line)))
+    length = len(line)
+    bounds = [0]
+    for offset in offsets[1:]:
+        offset = max(offset, bounds[-1])
+        while 0 < offset < length and not line[offset - 1].isspace() and not line[offset].isspace():
+            offset += 1
+        bounds.append(offset)
+    bounds.append(length)
+    return [line[start:end].strip() for start, end in zip(bounds, bounds[1:])]
@@ -0,0 +1,169 @@
+"""
+Compact sets of VLAN numbers, stored as sorted, non-overlapping ranges.
+
+Trunks report their VLANs as "1-4094" or as long comma lists. VlanRangeSet keeps
+such a list as two arrays of range starts and ends instead of one int per VLAN, so
+"1-4094" costs two numbers rather than 4094. Membership is a binary search over the
+ranges (O(log n)); union, intersection and difference walk both sets' ranges once.
+
+    allowed = VlanRangeSet.parse("1,10,20,30-35")
+    20 in allowed                                  # True
+    allowed & VlanRangeSet.parse("30-100")         # VlanRangeSet('30-35')
+    str(allowed | VlanRangeSet.parse("36"))        # '1,10,20,30-36'
+"""
+import bisect
+from array import array
+
+# Valid VLAN numbers (0 and 4095 are reserved).
+MIN_VLAN = 1
+MAX_VLAN = 4094
+
+
+class VlanRangeSet:
+    """
+    An immutable set of VLAN numbers held as sorted, merged (first, last) ranges.
+
+    Parameters:
+        ranges (iterable): (first, last) pairs, inclusive, in any order; overlapping
+            and adjacent ranges are merged.
+
+    Raises:
+        ValueError: If a range goes outside MIN_VLAN-MAX_VLAN.
+    """
+    __slots__ = ("_starts", "_ends")
+
+    def __init__(self, ranges=()):
+        self._starts = array("H")
+        self._ends = array("H")
+        for first, last in sorted(ranges):
+            if first > last:
+                continue
+            if first < MIN_VLAN or last > MAX_VLAN:
+                raise ValueError(f"VLAN range {first}-{last} is outside {MIN_VLAN}-{MAX_VLAN}.")
+            if self._ends and first <= self._ends[-1] + 1:
+                if last > self._ends[-1]:
+                    self._ends[-1] = last
+            else:
+                self._starts.append(first)
+                self._ends.append(last)
+
+    @classmethod
+    def parse(cls, text):
+        """
+        Parse a VLAN list as printed by IOS, e.g. "1,10,20,30-35", "1-4094" or "none".
+
+        Items that are not numbers or ranges are ignored. Ranges are clipped to
+        MIN_VLAN-MAX_VLAN ("0-10" -> 1-10), and ignored if they lie entirely outside it.
+        """
+        ranges = []
+        for item in text.replace(" ", "").split(","):
+            if not item or item == "none":
+                continue
+            first, _, last = item.partition("-")
+            try:
+                first, last = int(first), int(last or first)
+            except ValueError:
+                continue
+            first, last = max(first, MIN_VLAN), min(last, MAX_VLAN)
+            if first <= last:
+                ranges.append((first, last))
+        return cls(ranges)
+
+    @classmethod
+    def _from_sorted(cls, ranges):
+        # ranges are already sorted and merged.
+        result = cls()
+        for first, last in ranges:
+            result._starts.append(first)
+            result._ends.append(last)
+        return result
+
+    def ranges(self):
+        """
+        Return the set as a list of (first, last) ranges, in order.
+        """
+        return list(zip(self._starts, self._ends))
+
+    def __contains__(self, vlan):
+        index = bisect.bisect_right(self._starts, vlan) - 1
+        return index >= 0 and vlan <= self._ends[index]
+
+    def __len__(self):
+        return sum(self._ends) - sum(self._starts) + len(self._starts)
+
+    def __bool__(self):
+        return bool(self._starts)
+
+    def __iter__(self):
+        for first, last in zip(self._starts, self._ends):
+            yield from range(first, last + 1)
+
+    def __eq__(self, other):
+        if not isinstance(other, VlanRangeSet):
+            return NotImplemented
+        return self._starts == other._starts and self._ends == other._ends
+
+    def __hash__(self):
+        return hash((self._starts.tobytes(), self._ends.tobytes()))
+
+    def __or__(self, other):
+        return self.union(other)
+
+    def __and__(self, other):
+        return self.intersection(other)
+
+    def __sub__(self, other):
+        return self.difference(other)
+
+    def union(self, other):
+        """
+        Return the VLANs in either set.
+        """
+        return VlanRangeSet(self.ranges() + other.ranges())
+
+    def intersection(self, other):
+        """
+        Return the VLANs in both sets.
+        """
+        result = []
+        mine, theirs = self.ranges(), other.ranges()
+        i = j = 0
+        while i < len(mine) and j < len(theirs):
+            first = max(mine[i][0], theirs[j][0])
+            last = min(mine[i][1], theirs[j][1])
+            if first <= last:
+                result.append((first, last))
+            # Move past whichever range ends first.
+            if mine[i][1] < theirs[j][1]:
+                i += 1
+            else:
+                j += 1
+        return VlanRangeSet._from_sorted(result)
+
+    def difference(self, other):
+        """
+        Return the VLANs in this set but not in other.
+        """
+        result = []
+        theirs = other.ranges()
+        j = 0
+        for first, last in self.ranges():
+            # Skip other's ranges that end before this one starts.
+            while j < len(theirs) and theirs[j][1] < first:
+                j += 1
+            k = j
+            while k < len(theirs) and theirs[k][0] <= last:
+                if theirs[k][0] > first:
+                    result.append((first, theirs[k][0] - 1))
+                first = max(first, theirs[k][1] + 1)
+                k += 1
+            if first <= last:
+                result.append((first, last))
+        return VlanRangeSet._from_sorted(result)
+
+    def __str__(self):
+        return ",".join(str(first) if first == last else f"{first}-{last}"
+                        for first, last in zip(self._starts, self._ends))
+
+    def __repr__(self):
+        return f"VlanRangeSet({str(self)!r})"